@@ -0,0 +1,341 @@
+"""
+BENCHMARK DA CARGA DOS RELATÓRIOS DE ESTOQUE
+============================================
+
+Gera relatórios sintéticos (confec01, fatex01, estsc01, tecido01) no mesmo
+layout de largura fixa declarado em relatorios_estoque.py, com cabeçalhos de
+página e linhas de total como nos arquivos reais, e mede:
+
+- parse: leitura + parse (carga_lote.ler_relatorio, o mesmo dos process_*.py)
+- carga: leitura + parse + hash + INSERT em lote, nos modos 'lote'
+  (carga_lote.carregar_em_lote) e 'pipeline' (parse em uma thread produtora
+  em paralelo com os INSERT, pipeline_carga.py), em um MySQL local (tabela
+  bench_*, removida no fim) ou em um SQLite descartável no lugar do MySQL
+
+Cada medição roda em um processo próprio, para que o pico de memória (RSS)
+seja o da etapa e não o do processo inteiro. Exemplo:
+
+    python scripts/benchmark_carga.py --linhas 1000000 --destino sqlite --json bench.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from carga_lote import TAMANHO_LOTE_PADRAO, carregar_linhas, ler_relatorio
+from db import conectar_banco
+from metricas import pico_rss_mb
+from relatorios_estoque import RELATORIOS, TIPOS_TECIDO01, colunas_carga, com_hash, sql_criar_tabela
+
+DESTINOS = ('sqlite', 'mysql', 'nenhum')
+MODOS = ('lote', 'pipeline')
+
+# Linhas de dados distintas geradas por relatório; o arquivo sorteia entre elas
+# (os relatórios reais também repetem códigos, cores, quantidades e datas)
+LINHAS_DISTINTAS = 20000
+# Registros por página, entre o cabeçalho e a linha de total
+REGISTROS_POR_PAGINA = 55
+
+# Posição em que o gerador escreve os campos calculados (o parse os procura pelo conteúdo)
+POSICOES_CALCULADAS = {'metros': (57, 69)}
+
+
+def _decimal_br(valor, casas):
+    """Formata um inteiro escalado como no relatório: 123450, 2 -> '1.234,50'"""
+    inteiro, fracao = divmod(valor, 10 ** casas)
+    return f"{inteiro:,}".replace(',', '.') + f",{fracao:0{casas}d}"
+
+
+def _data_br(aleatorio):
+    return f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/{aleatorio.randint(20, 25):02d}"
+
+
+def _campos_estoque(aleatorio):
+    """Valores (texto já formatado) de uma linha de confec01/fatex01/estsc01"""
+    return {
+        'localizacao': f"{aleatorio.randint(1, 9)}.{aleatorio.randint(1, 30):02d}."
+                       f"{aleatorio.choice('ABCDEF')}.{aleatorio.randint(1, 999):03d}",
+        'codigo': f"{aleatorio.randint(0, 9999999):07d}",
+        'apelido': f"{aleatorio.choice(('STEIN', 'MALBEC', 'OXFORD', 'TRICOLINE', 'SARJA'))}"
+                   f" - {aleatorio.randint(1000, 9999)}",
+        'familia': str(aleatorio.randint(1, 99)),
+        'qual': f"{aleatorio.randint(0, 999):03d}",
+        'qmm': str(aleatorio.randint(1, 9)),
+        'cor': str(aleatorio.randint(1, 999)),
+        'qtde': _decimal_br(aleatorio.randint(0, 9999999), 2),
+        'desc_cor': aleatorio.choice(('MARROM CLA', 'CAPUCCINO', 'PRETO', 'BRANCO', 'AZUL MARINHO')),
+        'tam': aleatorio.choice(('P', 'M', 'G', 'GG', 'U')),
+        'tamd': str(aleatorio.randint(1, 9999)),
+        'embalagem_vol': str(aleatorio.randint(10 ** 12, 10 ** 13 - 1)),
+        'un': aleatorio.choice(('MT', 'KG', 'PC')),
+        'peso_liq': _decimal_br(aleatorio.randint(0, 9999999), 3),
+        'peso_bruto': _decimal_br(aleatorio.randint(0, 9999999), 3),
+    }
+
+
+def _campos_tecido01(aleatorio):
+    """Valores (texto já formatado) de uma linha de tecido01"""
+    return {
+        'tipo': aleatorio.choice(TIPOS_TECIDO01),
+        'produto': f"{aleatorio.randint(1, 9)}.{aleatorio.randint(0, 999):03d}-{aleatorio.randint(10, 99)}/0",
+        'codigo_produto': f"{aleatorio.randint(0, 999):03d}.{aleatorio.randint(0, 9999):04d}-"
+                          f"{aleatorio.randint(1, 99):02d}",
+        'entrada': _data_br(aleatorio),
+        'qualidade': f"{aleatorio.randint(1, 3)} A",
+        'metros': _decimal_br(aleatorio.randint(100, 999999), 2),
+        'lancamento': _data_br(aleatorio),
+        'oper': str(aleatorio.randint(1, 999)),
+        'peso': _decimal_br(aleatorio.randint(100, 9999999), 3),
+        'un': aleatorio.choice(('MT', 'KG')),
+        'localizacao': f"{aleatorio.randint(1, 9)}.{aleatorio.randint(1, 30):02d}."
+                       f"{aleatorio.choice('ABCDEF')}.{aleatorio.randint(1, 999):03d}",
+        'nota': str(aleatorio.randint(1, 999999)),
+    }
+
+
+def _montar_linha(layout, valores):
+    """Escreve cada valor na sua faixa do layout (números alinhados à direita)"""
+    largura = max(campo.fim for campo in layout.campos if campo.inicio is not None)
+    linha = [' '] * largura
+    for campo in layout.campos:
+        inicio, fim = (campo.inicio, campo.fim) if campo.inicio is not None else POSICOES_CALCULADAS[campo.nome]
+        texto = valores[campo.nome][:fim - inicio]
+        if campo.tipo == 'decimal' or campo.inicio is None:
+            texto = texto.rjust(fim - inicio)
+        linha[inicio:inicio + len(texto)] = texto
+    return ''.join(linha).rstrip()
+
+
+def _pagina(nome, aleatorio):
+    """Cabeçalho e linha de total de uma página do relatório"""
+    if nome == 'tecido01':
+        cabecalho = [
+            "CORTTEX IND. TEXTIL LTDA                         ESTOQUE DE TECIDOS",
+            "TIPO       PRODUTO        CODIGO         ENTRADA   QUAL METROS          LANCAMENTO",
+            "-" * 125,
+        ]
+        total = f"TEC ACAB   TOTAL QUAL A {_decimal_br(aleatorio.randint(0, 99999999), 2):>20}"
+    else:
+        empresa = 'FATEX' if nome == 'fatex01' else 'CORTTEX'
+        cabecalho = [
+            f"{empresa} IND. TEXTIL LTDA                         PAGINA {aleatorio.randint(1, 9999)}",
+            f"MAPEAMENTO DO ESTOQUE - {nome.upper()}",
+            f"PERIODO: {_data_br(aleatorio)} A {_data_br(aleatorio)}",
+            "LOCALIZAC  CODIGO   APELIDO                  FAM QUA QMM COR      QTDE DESCRICAO COR",
+            "-" * 142,
+        ]
+        total = f"           TOTAL DA LOCALIZACAO {_decimal_br(aleatorio.randint(0, 99999999), 2):>37}"
+    return cabecalho, total
+
+
+def gerar_relatorio(caminho, nome, linhas, semente=0):
+    """
+    Grava um relatório sintético com 'linhas' linhas no total (cabeçalhos,
+    registros e totais) e devolve quantas são registros de dados
+    """
+    aleatorio = random.Random(f"{nome}-{semente}")
+    layout = RELATORIOS[nome].layout
+    gerar_campos = _campos_tecido01 if nome == 'tecido01' else _campos_estoque
+    distintas = [_montar_linha(layout, gerar_campos(aleatorio)) for _ in range(LINHAS_DISTINTAS)]
+    if any(layout.parse(linha) is None for linha in distintas):
+        raise ValueError(f"{nome}: o gerador produziu uma linha que o layout não aceita")
+
+    escritas = 0
+    registros = 0
+    with open(caminho, 'w', encoding='utf-8', newline='\n') as f:
+        while escritas < linhas:
+            cabecalho, total = _pagina(nome, aleatorio)
+            pagina = cabecalho + aleatorio.choices(distintas, k=REGISTROS_POR_PAGINA) + [total, '']
+            pagina = pagina[:linhas - escritas]
+            f.write('\n'.join(pagina) + '\n')
+            escritas += len(pagina)
+            registros += max(0, min(len(pagina) - len(cabecalho), REGISTROS_POR_PAGINA))
+    return registros
+
+
+class _CursorSQLite:
+    """Cursor do sqlite3 aceitando os marcadores %s usados pelo CarregadorLote"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql, parametros=()):
+        self.cursor.execute(sql.replace('%s', '?'), parametros)
+
+    def executemany(self, sql, linhas):
+        self.cursor.executemany(sql.replace('%s', '?'), linhas)
+
+    def close(self):
+        self.cursor.close()
+
+
+class _ConexaoSQLite:
+    """SQLite no lugar do MySQL, com a interface de conexão usada pela carga em lote"""
+
+    def __init__(self, caminho):
+        sqlite3.register_adapter(Decimal, str)
+        sqlite3.register_adapter(date, date.isoformat)
+        self.conn = sqlite3.connect(caminho)
+
+    def cursor(self):
+        return _CursorSQLite(self.conn.cursor())
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+def _carregar(caminho, relatorio, destino, pasta, tamanho_lote, progresso, modo):
+    """Parse + carga em uma tabela bench_* descartável; devolve os registros inseridos"""
+    tabela = f"bench_{relatorio.tabela}"
+    colunas = colunas_carga(relatorio)
+    if destino == 'mysql':
+        conn = conectar_banco(perfil='carga')
+        if not conn:
+            raise RuntimeError("Sem conexão com o MySQL configurado no .env")
+        criar = sql_criar_tabela(relatorio, tabela)
+    else:
+        arquivo_sqlite = Path(pasta) / f"{tabela}.sqlite3"
+        arquivo_sqlite.unlink(missing_ok=True)
+        conn = _ConexaoSQLite(str(arquivo_sqlite))
+        criar = f"CREATE TABLE {tabela} ({', '.join(colunas)})"
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+        cursor.execute(criar)
+        linhas = ler_relatorio(caminho, relatorio.layout, progresso)
+        estatisticas = carregar_linhas(conn, tabela, colunas, com_hash(linhas), modo, tamanho_lote)
+        cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+        if destino == 'sqlite':
+            arquivo_sqlite.unlink(missing_ok=True)
+    return estatisticas['inseridos']
+
+
+def medir(etapa, caminho, nome, destino, pasta, tamanho_lote, modo='lote'):
+    """Executado em um processo próprio: mede uma etapa sobre um arquivo"""
+    relatorio = RELATORIOS[nome]
+    progresso = {'linhas': 0}
+    inicio = time.perf_counter()
+    # O progresso impresso pelo ler_relatorio vai para o nulo, sem o custo do terminal
+    with open(os.devnull, 'w') as nulo, redirect_stdout(nulo):
+        if etapa == 'parse':
+            registros = sum(1 for _ in ler_relatorio(caminho, relatorio.layout, progresso))
+        else:
+            registros = _carregar(caminho, relatorio, destino, pasta, tamanho_lote, progresso, modo)
+    duracao = time.perf_counter() - inicio
+
+    tamanho_mb = os.path.getsize(caminho) / (1024 * 1024)
+    return {
+        'relatorio': nome,
+        'etapa': etapa if etapa == 'parse' else f"carga ({destino}, {modo})",
+        'linhas': progresso['linhas'],
+        'registros': registros,
+        'duracao': duracao,
+        'linhas_por_segundo': progresso['linhas'] / duracao if duracao > 0 else 0.0,
+        'mb_por_segundo': tamanho_mb / duracao if duracao > 0 else 0.0,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def imprimir_resultados(resultados):
+    """Tabela com linhas/s, MB/s e pico de RSS de cada medição"""
+    print(f"\n{'Relatório':<10} {'Etapa':<24} {'Linhas':>10} {'Registros':>10} {'Tempo (s)':>10} "
+          f"{'Linhas/s':>11} {'MB/s':>8} {'Pico RSS (MB)':>14}")
+    for r in resultados:
+        pico = f"{r['pico_rss_mb']:.1f}" if r['pico_rss_mb'] is not None else 'n/d'
+        print(f"{r['relatorio']:<10} {r['etapa']:<24} {r['linhas']:>10} {r['registros']:>10} "
+              f"{r['duracao']:>10.2f} {r['linhas_por_segundo']:>11.0f} {r['mb_por_segundo']:>8.1f} {pico:>14}")
+
+
+def main(relatorios, linhas, destino='sqlite', pasta=None, tamanho_lote=TAMANHO_LOTE_PADRAO,
+         manter=False, saida_json=None, modos=MODOS):
+    """Função principal"""
+    pasta = Path(pasta or tempfile.mkdtemp(prefix='benchmark_carga_'))
+    pasta.mkdir(parents=True, exist_ok=True)
+    etapas = [('parse', None)]
+    if destino != 'nenhum':
+        etapas += [('carga', modo) for modo in modos]
+
+    resultados = []
+    for nome in relatorios:
+        caminho = pasta / f"{nome}.txt"
+        inicio = time.perf_counter()
+        registros = gerar_relatorio(caminho, nome, linhas)
+        print(f"{caminho}: {linhas} linhas ({registros} registros, "
+              f"{os.path.getsize(caminho) / (1024 * 1024):.1f} MB) geradas em {time.perf_counter() - inicio:.2f}s")
+
+        for etapa, modo in etapas:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                resultado = executor.submit(medir, etapa, str(caminho), nome, destino, str(pasta),
+                                            tamanho_lote, modo).result()
+            if resultado['registros'] != registros:
+                print(f"Aviso: {nome} {resultado['etapa']}: {resultado['registros']} registros, "
+                      f"esperados {registros}")
+            resultados.append(resultado)
+
+        if not manter:
+            caminho.unlink()
+
+    imprimir_resultados(resultados)
+
+    if saida_json:
+        with open(saida_json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'executado_em': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'linhas': linhas,
+                'destino': destino,
+                'tamanho_lote': tamanho_lote,
+                'modos': list(modos),
+                'resultados': resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {saida_json}")
+
+    if not manter:
+        try:
+            pasta.rmdir()
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do parse e da carga dos relatórios de estoque")
+    parser.add_argument('--relatorios', nargs='+', choices=list(RELATORIOS), default=list(RELATORIOS),
+                        help="Relatórios gerados e medidos (padrão: todos)")
+    parser.add_argument('--linhas', type=int, default=100000,
+                        help="Linhas de cada arquivo sintético, de 10 mil a 10 milhões (padrão: %(default)s)")
+    parser.add_argument('--destino', choices=DESTINOS, default='sqlite',
+                        help="Banco da etapa de carga: SQLite descartável, o MySQL do .env "
+                             "ou nenhum (só parse) (padrão: %(default)s)")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_PADRAO,
+                        help="Linhas por lote de INSERT (padrão: %(default)s)")
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS),
+                        help="Modos da etapa de carga medidos (padrão: todos)")
+    parser.add_argument('--pasta', help="Pasta dos arquivos gerados (padrão: uma pasta temporária)")
+    parser.add_argument('--manter', action='store_true', help="Mantém os arquivos gerados")
+    parser.add_argument('--json', dest='saida_json', help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args()
+    if not 10000 <= args.linhas <= 10000000:
+        parser.error("--linhas deve ficar entre 10000 e 10000000")
+    main(args.relatorios, args.linhas, args.destino, args.pasta, args.lote, args.manter, args.saida_json,
+         args.modos)
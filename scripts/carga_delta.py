@@ -0,0 +1,150 @@
+"""
+CARGA DELTA DAS TABELAS DE ESTOQUE
+==================================
+
+Em vez de DROP TABLE e recarga completa, compara as linhas parseadas com o
+que já está na tabela e aplica só os INSERT, UPDATE e DELETE necessários.
+
+Cada registro é identificado pela chave do relatório (relatorio.chave) mais
+a ordem de ocorrência dessa chave (o relatório pode repetir a mesma chave);
+a comparação usa o hash_linha gravado junto com o registro.
+"""
+
+import time
+from collections import Counter
+
+import mysql.connector
+
+import metricas
+from carga_lote import TAMANHO_LOTE_PADRAO
+from relatorios_estoque import colunas_carga, com_hash, sql_criar_indices
+
+
+def preparar_tabela_delta(conn, relatorio):
+    """
+    Cria a tabela se não existir e garante, em tabelas antigas, a coluna
+    hash_linha e os índices secundários declarados para o relatório.
+    Erros do banco são repassados para quem chamou.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {relatorio.tabela} ({relatorio.definicoes})")
+        cursor.execute(f"SHOW COLUMNS FROM {relatorio.tabela} LIKE 'hash_linha'")
+        if not cursor.fetchall():
+            print(f"Adicionando coluna hash_linha em {relatorio.tabela}...")
+            cursor.execute(f"ALTER TABLE {relatorio.tabela} ADD COLUMN hash_linha CHAR(32) AFTER {relatorio.layout.colunas[-1]}")
+
+        cursor.execute(f"SHOW INDEX FROM {relatorio.tabela}")
+        existentes = {indice[2] for indice in cursor.fetchall()}
+        faltantes = [indice for indice in relatorio.indices if indice[0] not in existentes]
+        if faltantes:
+            print(f"Criando índices {', '.join(nome for nome, _ in faltantes)} em {relatorio.tabela}...")
+            cursor.execute(sql_criar_indices(relatorio, indices=faltantes))
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def ler_snapshot_atual(conn, relatorio, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Devolve {(chave, ocorrencia): (id, hash_linha)} dos registros já gravados"""
+    atuais = {}
+    ocorrencias = Counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT id, {', '.join(relatorio.chave)}, hash_linha FROM {relatorio.tabela} ORDER BY id")
+        while True:
+            registros = cursor.fetchmany(tamanho_lote)
+            if not registros:
+                break
+            for registro in registros:
+                chave = tuple(registro[1:-1])
+                atuais[(chave, ocorrencias[chave])] = (registro[0], registro[-1])
+                ocorrencias[chave] += 1
+    finally:
+        cursor.close()
+    return atuais
+
+
+def _executar_em_lotes(cursor, sql, linhas, tamanho_lote):
+    execucao = metricas.atual()
+    for i in range(0, len(linhas), tamanho_lote):
+        inicio = time.perf_counter()
+        cursor.executemany(sql, linhas[i:i + tamanho_lote])
+        execucao.observar('gravacao_lote', time.perf_counter() - inicio)
+
+
+def _remover_em_lotes(cursor, tabela, ids, tamanho_lote):
+    execucao = metricas.atual()
+    for i in range(0, len(ids), tamanho_lote):
+        lote = ids[i:i + tamanho_lote]
+        inicio = time.perf_counter()
+        cursor.execute(f"DELETE FROM {tabela} WHERE id IN ({', '.join(['%s'] * len(lote))})", lote)
+        execucao.observar('gravacao_lote', time.perf_counter() - inicio)
+
+
+def carregar_delta(conn, relatorio, linhas, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Aplica na tabela só as diferenças entre as linhas parseadas e o snapshot
+    atual, em uma única transação (os leitores veem o antes ou o depois).
+    """
+    execucao = metricas.atual()
+    inicio = time.perf_counter()
+    with execucao.etapa('leitura_snapshot'):
+        atuais = ler_snapshot_atual(conn, relatorio, tamanho_lote)
+
+    colunas = colunas_carga(relatorio)
+    posicoes_chave = [relatorio.layout.colunas.index(coluna) for coluna in relatorio.chave]
+    ocorrencias = Counter()
+    inserts = []
+    updates = []
+    iguais = 0
+
+    for valores in com_hash(linhas):
+        chave = tuple(valores[posicao] for posicao in posicoes_chave)
+        existente = atuais.pop((chave, ocorrencias[chave]), None)
+        ocorrencias[chave] += 1
+        if existente is None:
+            inserts.append(valores)
+        elif existente[1] != valores[-1]:
+            updates.append((existente[0],) + valores)
+        else:
+            iguais += 1
+    deletes = [registro_id for registro_id, _ in atuais.values()]
+
+    cursor = conn.cursor()
+    try:
+        _remover_em_lotes(cursor, relatorio.tabela, deletes, tamanho_lote)
+        # UPDATE por id em lote: INSERT com id existente cai no ON DUPLICATE KEY UPDATE
+        _executar_em_lotes(
+            cursor,
+            f"INSERT INTO {relatorio.tabela} (id, {', '.join(colunas)}) "
+            f"VALUES ({', '.join(['%s'] * (len(colunas) + 1))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(f'{coluna} = VALUES({coluna})' for coluna in colunas)}",
+            updates, tamanho_lote)
+        _executar_em_lotes(
+            cursor,
+            f"INSERT INTO {relatorio.tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})",
+            inserts, tamanho_lote)
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    duracao = time.perf_counter() - inicio
+    execucao.somar_etapa('carga', duracao)
+    execucao.contar('registros_gravados', len(inserts) + len(updates))
+    execucao.contar('registros_removidos', len(deletes))
+    alterados = len(inserts) + len(updates) + len(deletes)
+    return {
+        'modo': 'delta',
+        'inseridos': len(inserts),
+        'atualizados': len(updates),
+        'removidos': len(deletes),
+        'inalterados': iguais,
+        'lotes': 1,
+        'erros': 0,
+        'duracao': duracao,
+        'linhas_por_segundo': alterados / duracao if duracao > 0 else 0.0,
+    }
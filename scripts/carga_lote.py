@@ -0,0 +1,313 @@
+"""
+CARGA EM LOTE PARA AS TABELAS DE ESTOQUE
+========================================
+
+Camada compartilhada pelos scripts process_*.py para inserir as linhas
+parseadas em lotes (executemany / INSERT com múltiplos VALUES) em vez de
+um cursor.execute por linha.
+
+O modo 'pipeline' (pipeline_carga.py) faz o parse em uma thread produtora
+enquanto os lotes são gravados.
+
+Também oferece o modo 'infile', que grava as linhas em um TSV temporário e
+usa LOAD DATA LOCAL INFILE, voltando para o modo em lote quando o servidor
+não permite local_infile.
+
+As linhas rejeitadas (campo que não converte, INSERT recusado pelo banco)
+vão para o arquivo de rejeitos da carga (rejeitos.Rejeitos), quando há um.
+"""
+
+import os
+import re
+import tempfile
+import time
+
+import mysql.connector
+
+import metricas
+
+TAMANHO_LOTE_PADRAO = 5000
+MODOS_CARGA = ('lote', 'pipeline', 'infile')
+
+# Erros do MySQL quando LOAD DATA LOCAL está desabilitado no cliente ou no servidor
+ERROS_LOCAL_INFILE = (1148, 2068, 3948)
+
+_ESCAPES_TSV = {'t': '\t', 'n': '\n', '\\': '\\'}
+_RE_ESCAPE_TSV = re.compile(r'\\(.)')
+
+
+class CarregadorLote:
+    """Acumula linhas e grava no banco em lotes, com um commit por lote"""
+
+    def __init__(self, conn, tabela, colunas, tamanho_lote=TAMANHO_LOTE_PADRAO, rejeitos=None):
+        self.conn = conn
+        self.tabela = tabela
+        self.colunas = list(colunas)
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.insert_sql = (
+            f"INSERT INTO {tabela} ({', '.join(self.colunas)}) "
+            f"VALUES ({', '.join(['%s'] * len(self.colunas))})"
+        )
+        self.buffer = []
+        self.inseridos = 0
+        self.lotes = 0
+        self.erros = 0
+        self.rejeitos = rejeitos
+        self.inicio = time.perf_counter()
+
+    def adicionar(self, valores):
+        """Adiciona uma linha (tupla na ordem de colunas) ao buffer"""
+        self.buffer.append(valores)
+        if len(self.buffer) >= self.tamanho_lote:
+            self.flush()
+
+    def flush(self):
+        """Grava o buffer atual em um único executemany e faz commit"""
+        if not self.buffer:
+            return
+        lote = self.buffer
+        self.buffer = []
+        self.gravar(lote)
+
+    def gravar(self, lote):
+        """Grava um lote já montado (usado direto pelos gravadores do pipeline_carga)"""
+        execucao = metricas.atual()
+        inicio = time.perf_counter()
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.insert_sql, lote)
+            self.conn.commit()
+            self.inseridos += len(lote)
+            execucao.contar('registros_gravados', len(lote))
+        except mysql.connector.Error as err:
+            # Se o lote falhar, refaz linha a linha para isolar as linhas ruins
+            print(f"Erro ao inserir lote {self.lotes + 1} em {self.tabela}: {err}")
+            self.conn.rollback()
+            execucao.contar('lotes_com_erro')
+            self._inserir_linha_a_linha(cursor, lote)
+        finally:
+            cursor.close()
+            execucao.observar('gravacao_lote', time.perf_counter() - inicio)
+        self.lotes += 1
+
+    def _inserir_linha_a_linha(self, cursor, lote):
+        execucao = metricas.atual()
+        for valores in lote:
+            try:
+                cursor.execute(self.insert_sql, valores)
+                self.inseridos += 1
+                execucao.contar('registros_gravados')
+            except mysql.connector.Error as err:
+                self.erros += 1
+                execucao.contar('erros_gravacao')
+                if self.rejeitos is not None:
+                    self.rejeitos.rejeitar(None, f"gravacao_{err.errno}",
+                                           '|'.join('' if valor is None else str(valor) for valor in valores))
+        self.conn.commit()
+
+    def finalizar(self):
+        """Grava o que restou no buffer e devolve as estatísticas da carga"""
+        self.flush()
+        duracao = time.perf_counter() - self.inicio
+        return {
+            'inseridos': self.inseridos,
+            'lotes': self.lotes,
+            'erros': self.erros,
+            'duracao': duracao,
+            'linhas_por_segundo': self.inseridos / duracao if duracao > 0 else 0.0,
+        }
+
+
+def ler_relatorio(caminho, layout, progresso, rejeitos=None):
+    """
+    Lê o relatório e devolve as tuplas do layout, contando as linhas lidas em
+    progresso['linhas']. Com rejeitos, os registros com campo inválido vão
+    para o arquivo de rejeitos e seguem com NULL, ou ficam de fora se
+    rejeitos.descartar.
+    """
+    parse = layout.parse
+    validar = layout.validar
+    tem_campo_nulo = layout.tem_campo_nulo
+    descartar = rejeitos is not None and rejeitos.descartar
+    lidas = registros = rejeitadas = 0
+    try:
+        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                progresso['linhas'] += 1
+                lidas += 1
+
+                # Mostrar progresso a cada 1000 linhas
+                if progresso['linhas'] % 1000 == 0:
+                    print(f"Processadas {progresso['linhas']} linhas...")
+
+                valores = parse(line)
+
+                if valores is not None:
+                    if rejeitos is not None and tem_campo_nulo(valores):
+                        motivo = validar(line, valores)
+                        if motivo:
+                            rejeitos.rejeitar(lidas, motivo, line)
+                            if descartar:
+                                rejeitadas += 1
+                                continue
+                    registros += 1
+                    yield valores
+        if rejeitos is not None:
+            rejeitos.verificar_orcamento(lidas, final=True)
+    finally:
+        execucao = metricas.atual()
+        execucao.contar('linhas_lidas', lidas)
+        execucao.contar('registros_parseados', registros)
+        execucao.contar('linhas_rejeitadas', rejeitadas)
+        execucao.contar('bytes_lidos', os.path.getsize(caminho))
+
+
+def carregar_em_lote(conn, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE_PADRAO, rejeitos=None):
+    """Carrega um iterável de tuplas usando o CarregadorLote"""
+    carregador = CarregadorLote(conn, tabela, colunas, tamanho_lote, rejeitos)
+    for valores in linhas:
+        carregador.adicionar(valores)
+    estatisticas = carregador.finalizar()
+    estatisticas['modo'] = 'lote'
+    return estatisticas
+
+
+def local_infile_habilitado(conn):
+    """Verifica se o servidor aceita LOAD DATA LOCAL INFILE"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SHOW GLOBAL VARIABLES LIKE 'local_infile'")
+        resultado = cursor.fetchone()
+        return bool(resultado) and str(resultado[1]).upper() in ('ON', '1')
+    except mysql.connector.Error:
+        return False
+    finally:
+        cursor.close()
+
+
+def _valor_tsv(valor):
+    """Formata um valor no formato padrão do LOAD DATA (\\N para NULL)"""
+    if valor is None:
+        return '\\N'
+    texto = str(valor)
+    if '\\' in texto or '\t' in texto or '\n' in texto:
+        texto = texto.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+    return texto
+
+
+def _ler_tsv(caminho):
+    """Relê o TSV temporário como tuplas (usado no fallback para o modo em lote)"""
+    with open(caminho, 'r', encoding='utf-8', newline='\n') as f:
+        for linha in f:
+            campos = linha.rstrip('\n').split('\t')
+            yield tuple(
+                None if campo == '\\N'
+                else _RE_ESCAPE_TSV.sub(lambda m: _ESCAPES_TSV.get(m.group(1), m.group(1)), campo)
+                for campo in campos
+            )
+
+
+def carregar_via_infile(conn, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE_PADRAO, rejeitos=None):
+    """
+    Grava as linhas em um TSV temporário e carrega com LOAD DATA LOCAL INFILE.
+    Se o local_infile estiver desabilitado, carrega o mesmo TSV pelo modo em lote.
+    """
+    inicio = time.perf_counter()
+    fd, caminho_tsv = tempfile.mkstemp(prefix=f'{tabela}_', suffix='.tsv')
+    try:
+        total = 0
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as tsv:
+            for valores in linhas:
+                tsv.write('\t'.join(_valor_tsv(valor) for valor in valores))
+                tsv.write('\n')
+                total += 1
+        tempo_tsv = time.perf_counter() - inicio
+        metricas.atual().somar_etapa('tsv', tempo_tsv)
+
+        if not local_infile_habilitado(conn):
+            print("local_infile desabilitado no servidor, usando carga em lote...")
+            return _fallback_lote(conn, tabela, colunas, caminho_tsv, tamanho_lote, inicio, tempo_tsv, rejeitos)
+
+        load_sql = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {tabela} "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' "
+            f"({', '.join(colunas)})"
+        )
+        inicio_load = time.perf_counter()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(load_sql, (caminho_tsv.replace('\\', '/'),))
+            carregadas = cursor.rowcount
+            conn.commit()
+            metricas.atual().observar('gravacao_lote', time.perf_counter() - inicio_load)
+            metricas.atual().contar('registros_gravados', carregadas)
+        except mysql.connector.Error as err:
+            conn.rollback()
+            if err.errno not in ERROS_LOCAL_INFILE:
+                raise
+            print(f"LOAD DATA LOCAL INFILE recusado ({err}), usando carga em lote...")
+            return _fallback_lote(conn, tabela, colunas, caminho_tsv, tamanho_lote, inicio, tempo_tsv, rejeitos)
+        finally:
+            cursor.close()
+
+        duracao = time.perf_counter() - inicio
+        return {
+            'modo': 'infile',
+            'inseridos': carregadas,
+            'lotes': 1,
+            'erros': total - carregadas,
+            'duracao': duracao,
+            'tempo_tsv': tempo_tsv,
+            'linhas_por_segundo': carregadas / duracao if duracao > 0 else 0.0,
+        }
+    finally:
+        if os.path.exists(caminho_tsv):
+            os.remove(caminho_tsv)
+
+
+def _fallback_lote(conn, tabela, colunas, caminho_tsv, tamanho_lote, inicio, tempo_tsv, rejeitos):
+    estatisticas = carregar_em_lote(conn, tabela, colunas, _ler_tsv(caminho_tsv), tamanho_lote, rejeitos)
+    estatisticas['modo'] = 'lote (fallback do infile)'
+    estatisticas['tempo_tsv'] = tempo_tsv
+    estatisticas['duracao'] = time.perf_counter() - inicio
+    duracao = estatisticas['duracao']
+    estatisticas['linhas_por_segundo'] = estatisticas['inseridos'] / duracao if duracao > 0 else 0.0
+    return estatisticas
+
+
+def carregar_linhas(conn, tabela, colunas, linhas, modo='lote', tamanho_lote=TAMANHO_LOTE_PADRAO, rejeitos=None,
+                    gravadores=1):
+    """Carrega as linhas no modo pedido ('lote', 'pipeline' ou 'infile')"""
+    with metricas.atual().etapa('carga'):
+        if modo == 'infile':
+            return carregar_via_infile(conn, tabela, colunas, linhas, tamanho_lote, rejeitos)
+        if modo == 'pipeline':
+            # Importado aqui: o pipeline_carga importa este módulo
+            from pipeline_carga import carregar_em_pipeline
+            return carregar_em_pipeline(conn, tabela, colunas, linhas, tamanho_lote, rejeitos, gravadores)
+        return carregar_em_lote(conn, tabela, colunas, linhas, tamanho_lote, rejeitos)
+
+
+def imprimir_resumo(linhas_processadas, estatisticas):
+    """Imprime o resumo final padrão das cargas de estoque"""
+    print("\nProcessamento concluído!")
+    print(f"Linhas processadas: {linhas_processadas}")
+    print(f"Dados inseridos: {estatisticas['inseridos']}")
+    if 'atualizados' in estatisticas:
+        print(f"Dados atualizados: {estatisticas['atualizados']}")
+        print(f"Dados removidos: {estatisticas['removidos']}")
+        print(f"Dados inalterados: {estatisticas['inalterados']}")
+    if estatisticas['erros']:
+        print(f"Linhas com erro: {estatisticas['erros']}")
+    print(f"Modo de carga: {estatisticas.get('modo', 'lote')}")
+    print(f"Lotes gravados: {estatisticas['lotes']}")
+    if 'tempo_tsv' in estatisticas:
+        print(f"Tempo de geração do TSV: {estatisticas['tempo_tsv']:.2f}s")
+    print(f"Tempo de carga: {estatisticas['duracao']:.2f}s "
+          f"({estatisticas['linhas_por_segundo']:.0f} linhas/s)")
+    if 'tempo_indices' in estatisticas:
+        print(f"Tempo de criação dos índices: {estatisticas['tempo_indices']:.2f}s")
+    if 'tempo_troca' in estatisticas:
+        print(f"Tempo de validação e troca da tabela: {estatisticas['tempo_troca']:.2f}s")
@@ -0,0 +1,127 @@
+"""
+CARGA DE UM RELATÓRIO DE ESTOQUE
+================================
+
+Corpo comum dos scripts process_confec01/fatex01/estsc01/tecido01: lê o TXT
+do relatório em bases/estoque/, faz o parse pelo layout declarado em
+relatorios_estoque e carrega a tabela via staging + troca (ou aplica o
+delta). Os scripts só escolhem o Relatorio.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import mysql.connector
+
+from carga_lote import MODOS_CARGA, TAMANHO_LOTE_PADRAO, imprimir_resumo, ler_relatorio
+from carga_delta import carregar_delta, preparar_tabela_delta
+from db import conectar_banco, preparar_pool
+from metricas import atual, executar
+from parse_paralelo import ler_relatorio_paralelo
+from parse_vetorizado import MOTORES_PARSE, disponivel, ler_relatorio_vetorizado
+from rejeitos import OrcamentoErrosExcedido, Rejeitos, orcamento_erros
+from relatorios_estoque import colunas_carga, com_hash
+from troca_tabela import carregar_com_troca
+
+PASTA_ESTOQUE = Path('bases/estoque')
+
+
+def processar_relatorio(relatorio, tamanho_lote=TAMANHO_LOTE_PADRAO, modo='pipeline', processos=1, delta=False,
+                        max_rejeitos=(None, None), gravadores=1, motor='linha', descartar_invalidas=False):
+    """Processa o arquivo do relatório e insere no banco de dados"""
+    arquivo_entrada = PASTA_ESTOQUE / f'{relatorio.nome}.txt'
+
+    if not arquivo_entrada.exists():
+        print(f"Arquivo {arquivo_entrada} não encontrado!")
+        atual().falhar(f"arquivo {arquivo_entrada} não encontrado")
+        return
+    atual().registrar_entrada(arquivo_entrada)
+
+    # No pipeline, uma conexão do pool por gravador
+    if not preparar_pool(gravadores if modo == 'pipeline' else 1, allow_local_infile=(modo == 'infile')):
+        atual().falhar("sem conexão com o banco")
+        return
+    conn = conectar_banco(allow_local_infile=(modo == 'infile'), perfil='carga')
+    if not conn:
+        atual().falhar("sem conexão com o banco")
+        return
+
+    rejeitos = Rejeitos(relatorio.nome, max_rejeitos, descartar=descartar_invalidas)
+    try:
+        # Na carga delta a tabela é mantida e só as diferenças são aplicadas;
+        # na carga completa a tabela nova é montada em staging e trocada no final
+        if delta:
+            preparar_tabela_delta(conn, relatorio)
+        progresso = {'linhas': 0}
+
+        print(f"Iniciando processamento do arquivo {arquivo_entrada.name} (modo: {'delta' if delta else modo})...")
+
+        if processos > 1:
+            linhas = ler_relatorio_paralelo(arquivo_entrada, relatorio.nome, processos, progresso,
+                                            rejeitos=rejeitos, motor=motor)
+        elif motor == 'vetorizado':
+            linhas = ler_relatorio_vetorizado(arquivo_entrada, relatorio.layout, progresso, rejeitos)
+        else:
+            linhas = ler_relatorio(arquivo_entrada, relatorio.layout, progresso, rejeitos)
+        if delta:
+            estatisticas = carregar_delta(conn, relatorio, linhas, tamanho_lote)
+        else:
+            estatisticas = carregar_com_troca(conn, relatorio, com_hash(linhas), colunas_carga(relatorio),
+                                              modo, tamanho_lote, rejeitos, gravadores)
+
+        imprimir_resumo(progresso['linhas'], estatisticas)
+        return estatisticas
+
+    except Exception as e:
+        # Desfaz o que estava pendente e repassa o erro: a execução tem de sair com falha
+        print(f"Erro durante processamento: {e}")
+        conn.rollback()
+        raise
+    finally:
+        rejeitos.fechar()
+        rejeitos.imprimir_resumo()
+        if conn:
+            conn.close()
+
+
+def main(relatorio):
+    """Linha de comando dos scripts process_<relatorio>.py"""
+    parser = argparse.ArgumentParser(
+        description=f"Carrega o arquivo {relatorio.nome}.txt na tabela {relatorio.tabela}")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_PADRAO,
+                        help="Linhas por lote de INSERT (padrão: %(default)s)")
+    parser.add_argument('--modo', choices=MODOS_CARGA, default='pipeline',
+                        help="'lote' usa INSERT em lote; 'pipeline' faz o parse em paralelo com os INSERT em lote; "
+                             "'infile' usa LOAD DATA LOCAL INFILE (padrão: %(default)s)")
+    parser.add_argument('--gravadores', type=int, default=1,
+                        help="Conexões gravando os lotes no modo pipeline; acima de 1 os ids deixam de seguir "
+                             "a ordem do arquivo (padrão: %(default)s)")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Processos de parse; acima de 1 divide o arquivo em blocos (padrão: %(default)s)")
+    parser.add_argument('--motor', choices=MOTORES_PARSE, default='linha',
+                        help="Motor de parse: 'linha' (LayoutFixo) ou 'vetorizado' (numpy, parse_vetorizado.py) "
+                             "(padrão: %(default)s)")
+    parser.add_argument('--delta', action='store_true',
+                        help="Mantém a tabela e aplica só os registros incluídos, alterados e removidos")
+    parser.add_argument('--max-rejeitos', type=orcamento_erros, default=(None, None),
+                        help="Orçamento de erros: interrompe a carga (sem alterar a tabela) quando as linhas "
+                             "rejeitadas passam de N ou de P%% das linhas lidas (ex.: 500 ou 0.5%%)")
+    parser.add_argument('--descartar-invalidas', action='store_true',
+                        help="Deixa fora da tabela os registros com campo numérico ou de data inválido (por "
+                             "padrão são carregados com NULL no campo e só registrados no arquivo de rejeitos)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Grava relatórios do cProfile e do tracemalloc da execução em perfis/")
+    args = parser.parse_args()
+    if args.motor == 'vetorizado' and not disponivel():
+        parser.error("o motor vetorizado requer o numpy (pip install numpy)")
+    try:
+        with executar(f'process_{relatorio.nome}', perfil=args.profile) as execucao:
+            processar_relatorio(relatorio, tamanho_lote=args.lote, modo=args.modo, processos=args.processos,
+                                delta=args.delta, max_rejeitos=args.max_rejeitos, gravadores=args.gravadores,
+                                motor=args.motor, descartar_invalidas=args.descartar_invalidas)
+    except (OrcamentoErrosExcedido, RuntimeError, mysql.connector.Error):
+        # Já impresso por processar_relatorio; o código de saída avisa o agendador
+        sys.exit(1)
+    if execucao.status != 'ok':
+        sys.exit(1)
@@ -0,0 +1,53 @@
+"""
+CONVERSORES DOS CAMPOS DOS RELATÓRIOS
+=====================================
+
+Conversão dos campos numéricos e de data dos relatórios TXT do mainframe,
+compartilhada por todos os layouts (layout_fixo.CONVERSORES) e pelos campos
+calculados de relatorios_estoque.
+
+- Números no formato brasileiro ('1.234,56') viram Decimal exato, sem a
+  perda de precisão do float nas colunas DECIMAL(10,2) e DECIMAL(10,3).
+- Datas 'DD/MM/YY' viram datetime.date.
+
+As duas conversões são memorizadas: um relatório com milhões de linhas
+repete poucos milhares de quantidades, pesos e datas distintos, e o
+resultado (Decimal e date são imutáveis) pode ser compartilhado entre as
+linhas.
+"""
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+# Valores distintos mantidos em cada cache (o menos usado recentemente sai primeiro)
+TAMANHO_CACHE = 65536
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def converter_decimal(texto):
+    """
+    Converte '1.234,56' para Decimal('1234.56'); vazio ou inválido vira None.
+    Sem vírgula o texto é lido como está ('42.5' continua 42.5).
+    """
+    if not texto:
+        return None
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        return None
+    return valor if valor.is_finite() else None
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def converter_data(texto):
+    """Converte 'DD/MM/YY' para date(20YY, MM, DD); vazio ou inválido vira None"""
+    if not texto or '/' not in texto:
+        return None
+    try:
+        dia, mes, ano = (int(parte) for parte in texto.split('/'))
+        return date(ano + 2000 if ano < 100 else ano, mes, dia)
+    except ValueError:
+        return None
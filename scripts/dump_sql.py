@@ -0,0 +1,176 @@
+"""
+ARQUIVOS DE DUMP SQL
+====================
+
+Abertura dos dumps gerados pelo export_database_sql.py e lidos pelo
+import_sql_exports.py. A compressão é definida pela extensão do arquivo:
+.sql (texto puro), .sql.gz (gzip) ou .sql.zst (zstd, se o módulo zstandard
+estiver instalado). Os arquivos são lidos e gravados em streaming, sem
+descompactar nada no disco.
+
+ler_declaracoes separa as declarações de um dump lendo uma linha por vez:
+só a declaração em montagem fica na memória, não o arquivo inteiro.
+"""
+
+import gzip
+import re
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSOES = {
+    'nenhuma': '.sql',
+    'gzip': '.sql.gz',
+    'zstd': '.sql.zst',
+}
+COMPRESSOES = tuple(EXTENSOES)
+
+
+def compressoes_disponiveis():
+    """Compressões suportadas neste ambiente (zstd só com o zstandard instalado)"""
+    return tuple(nome for nome in COMPRESSOES if nome != 'zstd' or zstandard is not None)
+
+
+def eh_dump(nome_arquivo):
+    """Verifica se o nome do arquivo é de um dump SQL (comprimido ou não)"""
+    return str(nome_arquivo).endswith(tuple(EXTENSOES.values()))
+
+
+def compressao_do_arquivo(nome_arquivo):
+    """Descobre a compressão pela extensão do arquivo"""
+    nome_arquivo = str(nome_arquivo)
+    if nome_arquivo.endswith(EXTENSOES['gzip']):
+        return 'gzip'
+    if nome_arquivo.endswith(EXTENSOES['zstd']):
+        return 'zstd'
+    return 'nenhuma'
+
+
+def abrir_dump(caminho, modo='r'):
+    """Abre o dump em modo texto ('r' ou 'w'), comprimindo/descomprimindo conforme a extensão"""
+    compressao = compressao_do_arquivo(caminho)
+    if compressao == 'gzip':
+        # Nível 6: quase o tamanho do nível 9 com bem menos CPU
+        return gzip.open(caminho, modo + 't', encoding='utf-8', compresslevel=6)
+    if compressao == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(f"{caminho}: compressão zstd requer o módulo zstandard (pip install zstandard)")
+        return zstandard.open(caminho, modo + 't', encoding='utf-8')
+    return open(caminho, modo, encoding='utf-8')
+
+
+# Próximo caractere relevante fora de strings: fim de declaração, início de
+# string/identificador ou de comentário ("-- " exige espaço depois, como no MySQL)
+_RE_NORMAL = re.compile(r"[;'\"`]|--(?=\s)|#|/\*")
+# Conteúdo de uma string até a aspa que a fecha (ou até o fim da linha):
+# trechos sem aspas/barras, escapes por barra invertida e aspas dobradas
+_RE_CORPO_ASPAS = {
+    "'": re.compile(r"(?:[^'\\]+|\\.|'')*", re.S),
+    '"': re.compile(r'(?:[^"\\]+|\\.|"")*', re.S),
+    '`': re.compile(r"(?:[^`]+|``)*"),
+}
+
+
+def ler_declaracoes(arquivo):
+    """
+    Lê um dump SQL em streaming e devolve uma declaração completa por vez
+    (sem o ';' final). Respeita strings entre aspas simples e duplas (com
+    escapes por barra invertida ou aspas dobradas) e identificadores entre
+    crases; comentários de linha (-- e #) são descartados e comentários de
+    bloco são mantidos, sem que um ';' dentro deles encerre a declaração.
+    """
+    partes = []
+    aspas = None          # aspas abertas (', " ou `) ou None
+    em_comentario = False  # dentro de /* ... */
+
+    for linha in arquivo:
+        pos = 0
+        tamanho = len(linha)
+        while pos < tamanho:
+            if em_comentario:
+                fim = linha.find('*/', pos)
+                if fim == -1:
+                    partes.append(linha[pos:])
+                    break
+                partes.append(linha[pos:fim + 2])
+                pos = fim + 2
+                em_comentario = False
+
+            elif aspas:
+                fim = _RE_CORPO_ASPAS[aspas].match(linha, pos).end()
+                if fim == tamanho:
+                    # String continua na próxima linha
+                    partes.append(linha[pos:])
+                    break
+                partes.append(linha[pos:fim + 1])
+                pos = fim + 1
+                aspas = None
+
+            else:
+                achado = _RE_NORMAL.search(linha, pos)
+                if achado is None:
+                    partes.append(linha[pos:])
+                    break
+                fim = achado.start()
+                token = achado.group()
+                if token == ';':
+                    partes.append(linha[pos:fim])
+                    declaracao = ''.join(partes).strip()
+                    partes = []
+                    if declaracao:
+                        yield declaracao
+                    pos = fim + 1
+                elif token in ('--', '#'):
+                    # Comentário até o fim da linha
+                    partes.append(linha[pos:fim])
+                    partes.append('\n')
+                    break
+                elif token == '/*':
+                    partes.append(linha[pos:fim + 2])
+                    pos = fim + 2
+                    em_comentario = True
+                else:
+                    partes.append(linha[pos:fim + 1])
+                    pos = fim + 1
+                    aspas = token
+
+    declaracao = ''.join(partes).strip()
+    if declaracao:
+        yield declaracao
+
+
+# Linhas de índice secundário no SHOW CREATE TABLE: "  KEY `idx` (`col`),"
+_RE_INDICE_SECUNDARIO = re.compile(r"^\s*((?:UNIQUE |FULLTEXT |SPATIAL )?KEY\s.*?),?\s*$")
+
+
+def separar_indices_secundarios(create_table):
+    """
+    Tira os índices secundários de um CREATE TABLE (no formato do SHOW CREATE
+    TABLE, uma definição por linha) para criá-los só depois dos dados.
+    Devolve (create_sem_indices, definicoes_dos_indices). Tabelas com FOREIGN
+    KEY ficam como estão: o MySQL criaria sozinho os índices das chaves
+    estrangeiras e o ADD INDEX posterior falharia por nome duplicado.
+    """
+    if 'FOREIGN KEY' in create_table.upper():
+        return create_table, []
+
+    linhas = create_table.split('\n')
+    mantidas = []
+    indices = []
+    for linha in linhas:
+        achado = _RE_INDICE_SECUNDARIO.match(linha)
+        if achado:
+            indices.append(achado.group(1))
+        else:
+            mantidas.append(linha)
+    if not indices:
+        return create_table, []
+
+    # A última definição antes do ")" de fechamento não pode terminar em vírgula
+    for i in range(len(mantidas) - 1, 0, -1):
+        if mantidas[i].lstrip().startswith(')'):
+            mantidas[i - 1] = mantidas[i - 1].rstrip().rstrip(',')
+            break
+    return '\n'.join(mantidas), indices
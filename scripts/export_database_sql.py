@@ -6,28 +6,40 @@ EXPORTADOR DE TABELAS MYSQL PARA SQL
 Script para exportar todas as tabelas do banco de dados MySQL para arquivos SQL separados.
 Cada arquivo contém a estrutura da tabela (CREATE TABLE) e todos os dados (INSERT INTO).
 
+Com --jobs N as tabelas são exportadas em paralelo por N conexões, das maiores para as
+menores, todas dentro do mesmo snapshot consistente (o dump continua sendo de um único
+instante).
+
+Tabelas grandes com chave primária inteira são divididas em faixas da chave
+(WHERE id BETWEEN a AND b), cada faixa em seu próprio arquivo de parte, dentro de uma
+pasta <tabela>_<timestamp>/ com um manifest.json. Uma exportação interrompida pode ser
+retomada com --retomar, refazendo só as partes que faltaram.
+
+Com --compressao gzip (ou zstd, se o módulo zstandard estiver instalado) os arquivos
+são gravados já comprimidos (.sql.gz / .sql.zst), direto do streaming dos lotes.
+
+Com --colunar cada tabela (ou parte) também é gravada em um snapshot colunar tipado
+ao lado do dump (snapshot_colunar.py: Parquet com pyarrow, senão o formato .col).
+
 Autor: GitHub Copilot
 Data: 2025-09-15
 """
 
 import mysql.connector
+import argparse
 import os
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import datetime
 
-def conectar_banco():
-    """Conecta ao banco de dados MySQL"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='123456789',
-            database='datalake'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(f"Erro ao conectar ao banco: {err}")
-        return None
+from db import conectar_banco, preparar_pool
+from dump_sql import EXTENSOES, abrir_dump, compressao_do_arquivo, compressoes_disponiveis
+from metricas import atual, executar
+from snapshot_colunar import GravadorSnapshot
 
 def obter_todas_tabelas(conn):
     """Obtém lista de todas as tabelas do banco"""
@@ -40,6 +52,96 @@ def obter_todas_tabelas(conn):
         print(f"Erro ao obter tabelas: {err}")
         return []
 
+def obter_estatisticas_tabelas(conn):
+    """Devolve {tabela: (bytes de dados + índices, linhas estimadas)}"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT table_name, COALESCE(data_length, 0) + COALESCE(index_length, 0), "
+            "COALESCE(table_rows, 0) FROM information_schema.tables WHERE table_schema = DATABASE()"
+        )
+        estatisticas = {nome: (tamanho, linhas) for nome, tamanho, linhas in cursor.fetchall()}
+        cursor.close()
+        return estatisticas
+    except mysql.connector.Error as err:
+        print(f"Erro ao obter tamanho das tabelas: {err}")
+        return {}
+
+def ordenar_por_tamanho(tabelas, estatisticas):
+    """Ordena as tabelas da maior para a menor (dados + índices)"""
+    return sorted(tabelas, key=lambda tabela: estatisticas.get(tabela, (0, 0))[0], reverse=True)
+
+def obter_chave_inteira(conn, tabela):
+    """Devolve o nome da chave primária se ela for uma única coluna inteira, senão None"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_key = 'PRI'",
+            (tabela,)
+        )
+        chaves = cursor.fetchall()
+        cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Erro ao obter chave primária da tabela {tabela}: {err}")
+        return None
+    if len(chaves) == 1 and chaves[0][1].lower() in ('tinyint', 'smallint', 'mediumint', 'int', 'bigint'):
+        return chaves[0][0]
+    return None
+
+def planejar_faixas(conn, tabela, chave, linhas_por_parte):
+    """
+    Divide o intervalo MIN..MAX da chave em faixas de linhas_por_parte valores.
+    A última faixa fica aberta (fim None) para não perder linhas com id maior
+    inseridas depois do planejamento.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN({chave}), MAX({chave}) FROM {tabela}")
+    minimo, maximo = cursor.fetchone()
+    cursor.close()
+    if minimo is None:
+        return []
+    faixas = []
+    inicio = minimo
+    while inicio + linhas_por_parte <= maximo:
+        faixas.append((inicio, inicio + linhas_por_parte - 1))
+        inicio += linhas_por_parte
+    faixas.append((inicio, None))
+    return faixas
+
+def abrir_conexoes_snapshot(conn, quantidade):
+    """
+    Abre as conexões de exportação, cada uma com START TRANSACTION WITH CONSISTENT
+    SNAPSHOT. Com mais de uma conexão os snapshots são abertos sob FLUSH TABLES WITH
+    READ LOCK, para que todas enxerguem o mesmo instante do banco.
+    """
+    cursor = conn.cursor()
+    bloqueado = False
+    if quantidade > 1:
+        try:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+            bloqueado = True
+        except mysql.connector.Error as err:
+            print(f"  ⚠️  Sem FLUSH TABLES WITH READ LOCK ({err}); os snapshots das conexões "
+                  f"serão abertos em sequência e podem diferir por alguns instantes")
+
+    conexoes = []
+    try:
+        for _ in range(quantidade):
+            conexao = conectar_banco()
+            if not conexao:
+                break
+            cursor_snapshot = conexao.cursor()
+            cursor_snapshot.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor_snapshot.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cursor_snapshot.close()
+            conexoes.append(conexao)
+    finally:
+        if bloqueado:
+            cursor.execute("UNLOCK TABLES")
+        cursor.close()
+    return conexoes
+
 def obter_estrutura_tabela(conn, tabela):
     """Obtém a estrutura CREATE TABLE de uma tabela"""
     try:
@@ -51,18 +153,36 @@ def obter_estrutura_tabela(conn, tabela):
         print(f"Erro ao obter estrutura da tabela {tabela}: {err}")
         return None
 
-def obter_dados_tabela(conn, tabela):
-    """Obtém todos os dados de uma tabela"""
+def obter_dados_tabela(conn, tabela, tamanho_lote=1000, filtro='', parametros=()):
+    """
+    Abre um cursor não bufferizado sobre a tabela (opcionalmente com um filtro
+    WHERE) e devolve as colunas e um gerador de lotes de linhas (fetchmany),
+    sem carregar a tabela na memória
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT * FROM {tabela}")
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(f"SELECT * FROM {tabela} {filtro}".rstrip(), parametros)
         colunas = [desc[0] for desc in cursor.description]
-        dados = cursor.fetchall()
-        return colunas, dados
     except mysql.connector.Error as err:
         print(f"Erro ao obter dados da tabela {tabela}: {err}")
         return None, []
 
+    def lotes():
+        execucao = atual()
+        try:
+            while True:
+                inicio = time.perf_counter()
+                linhas = cursor.fetchmany(tamanho_lote)
+                execucao.observar('leitura_lote', time.perf_counter() - inicio)
+                if not linhas:
+                    break
+                execucao.contar('registros_exportados', len(linhas))
+                yield linhas
+        finally:
+            cursor.close()
+
+    return colunas, lotes()
+
 def escapar_valor_sql(valor):
     """Escapa valores para uso em SQL"""
     if valor is None:
@@ -77,108 +197,352 @@ def escapar_valor_sql(valor):
     else:
         return str(valor)
 
-def criar_arquivo_sql(tabela, estrutura, colunas, dados, pasta_saida):
-    """Cria arquivo SQL para uma tabela"""
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    nome_arquivo = f"{tabela}_{timestamp}.sql"
+def escrever_inserts(arquivo, tabela, colunas, lotes):
+    """Grava um INSERT por lote (1000 linhas) assim que o lote chega; devolve o total de linhas"""
+    total_registros = 0
+    insert = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES\n"
+    for lote in lotes:
+        if total_registros == 0:
+            arquivo.write(f"-- Dados da tabela {tabela}\n")
+        arquivo.write(insert)
+        arquivo.write(",\n".join(
+            f"({', '.join([escapar_valor_sql(valor) for valor in linha])})" for linha in lote
+        ))
+        arquivo.write(";\n\n")
+        total_registros += len(lote)
+    return total_registros
+
+def criar_arquivo_sql(tabela, estrutura, colunas, lotes, pasta_saida, nome_arquivo=None, descricao='',
+                      compressao='nenhuma'):
+    """
+    Cria arquivo SQL para uma tabela (ou uma parte dela), gravando cada grupo
+    de INSERT assim que o lote correspondente chega do banco (memória constante).
+    Sem estrutura, o arquivo leva só os dados (partes de uma exportação em faixas).
+    """
+    if nome_arquivo is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_arquivo = f"{tabela}_{timestamp}{EXTENSOES[compressao]}"
     caminho_arquivo = Path(pasta_saida) / nome_arquivo
 
+    inicio = time.perf_counter()
     try:
-        with open(caminho_arquivo, 'w', encoding='utf-8') as arquivo:
+        with abrir_dump(caminho_arquivo, 'w') as arquivo:
             # Cabeçalho
-            arquivo.write(f"-- Exportação da tabela {tabela}\n")
+            arquivo.write(f"-- Exportação da tabela {tabela}{descricao}\n")
             arquivo.write(f"-- Gerado em: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             arquivo.write("--\n\n")
 
             # Estrutura da tabela
-            arquivo.write(f"-- Estrutura da tabela {tabela}\n")
-            arquivo.write(f"{estrutura};\n\n")
+            if estrutura:
+                arquivo.write(f"-- Estrutura da tabela {tabela}\n")
+                arquivo.write(f"{estrutura};\n\n")
 
             # Dados da tabela
-            if dados:
-                arquivo.write(f"-- Dados da tabela {tabela}\n")
-                valores = []
-                for linha in dados:
-                    valores_linha = [escapar_valor_sql(valor) for valor in linha]
-                    valores.append(f"({', '.join(valores_linha)})")
-
-                # Quebrar em grupos de 1000 inserts para evitar arquivos muito grandes
-                grupo_size = 1000
-                for i in range(0, len(valores), grupo_size):
-                    grupo = valores[i:i + grupo_size]
-                    arquivo.write(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES\n")
-                    arquivo.write(",\n".join(grupo))
-                    arquivo.write(";\n\n")
-
-        return caminho_arquivo, len(dados)
+            total_registros = escrever_inserts(arquivo, tabela, colunas, lotes)
+
+        atual().observar('exportacao_arquivo', time.perf_counter() - inicio)
+        atual().contar('arquivos_escritos')
+        atual().contar('bytes_escritos', caminho_arquivo.stat().st_size)
+        return caminho_arquivo, total_registros
 
     except Exception as e:
         print(f"Erro ao criar arquivo SQL para {tabela}: {e}")
+        # Fechar o cursor não bufferizado para a conexão poder ser reutilizada
+        if hasattr(lotes, 'close'):
+            lotes.close()
+        # Não deixar um arquivo pela metade na pasta de exportação
+        if caminho_arquivo.exists():
+            caminho_arquivo.unlink()
         return None, 0
 
-def main():
+def salvar_manifesto(exportacao):
+    """Grava o manifest.json da exportação em faixas (escrita atômica)"""
+    caminho = exportacao['pasta'] / 'manifest.json'
+    temporario = caminho.with_suffix('.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(exportacao['manifesto'], arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def iniciar_exportacao_em_faixas(conn, tabela, chave, faixas, pasta_saida, compressao='nenhuma',
+                                 colunar=False):
+    """
+    Cria a pasta da tabela, o arquivo de estrutura e o manifesto com todas as
+    partes pendentes. Devolve None (sem pasta nem manifesto) se a estrutura
+    não for exportada.
+    """
+    estrutura = obter_estrutura_tabela(conn, tabela)
+    if not estrutura:
+        return None
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    pasta = Path(pasta_saida) / f"{tabela}_{timestamp}"
+    pasta.mkdir(exist_ok=True)
+
+    extensao = EXTENSOES[compressao]
+    arquivo_estrutura = f"{tabela}_estrutura{extensao}"
+    caminho_estrutura, _ = criar_arquivo_sql(tabela, estrutura, [], [], pasta, arquivo_estrutura, " (estrutura)")
+    if caminho_estrutura is None:
+        # Sem a estrutura o importador recriaria a tabela errado: nenhuma parte nem manifesto
+        pasta.rmdir()
+        return None
+
+    manifesto = {
+        'tabela': tabela,
+        'gerado_em': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'chave': chave,
+        'estrutura': arquivo_estrutura,
+        'status': 'pendente',
+        'colunar': colunar,
+        'partes': [
+            {
+                'arquivo': f"{tabela}_parte{indice:04d}{extensao}",
+                'inicio': inicio,
+                'fim': fim,
+                'status': 'pendente',
+                'registros': 0,
+            }
+            for indice, (inicio, fim) in enumerate(faixas, 1)
+        ],
+    }
+    exportacao = {'pasta': pasta, 'manifesto': manifesto, 'trava': threading.Lock()}
+    salvar_manifesto(exportacao)
+    return exportacao
+
+def carregar_exportacoes_incompletas(pasta_saida):
+    """Encontra as exportações em faixas com partes pendentes (para --retomar)"""
+    exportacoes = []
+    for caminho in sorted(Path(pasta_saida).glob('*/manifest.json')):
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+        if manifesto.get('status') != 'concluido':
+            exportacoes.append({'pasta': caminho.parent, 'manifesto': manifesto, 'trava': threading.Lock()})
+    return exportacoes
+
+def obter_tipos_colunas(conn, tabela):
+    """Devolve [(coluna, data_type, column_type, precisão, escala)] na ordem das colunas da tabela"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT column_name, data_type, column_type, numeric_precision, numeric_scale "
+            "FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s "
+            "ORDER BY ordinal_position",
+            (tabela,)
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def abrir_snapshot(conn, tabela, estrutura, pasta, nome_arquivo):
+    """Abre o snapshot colunar gravado ao lado do dump (mesmo nome, outra extensão)"""
+    if estrutura is None:
+        estrutura = obter_estrutura_tabela(conn, tabela)
+    base = nome_arquivo[:-len(EXTENSOES[compressao_do_arquivo(nome_arquivo)])]
+    return GravadorSnapshot(Path(pasta) / base, tabela, estrutura, obter_tipos_colunas(conn, tabela))
+
+def com_snapshot(lotes, snapshot):
+    """Repassa os lotes para o dump SQL gravando também o snapshot colunar"""
+    try:
+        for lote in lotes:
+            snapshot.adicionar(lote)
+            yield lote
+    finally:
+        # Fecha o cursor não bufferizado também quando o dump é interrompido
+        lotes.close()
+
+def fechar_snapshot(snapshot, caminho_arquivo):
+    """Finaliza o snapshot se o dump foi gravado; senão descarta o arquivo incompleto"""
+    if caminho_arquivo:
+        print(f"  🧱 Snapshot colunar: {Path(snapshot.finalizar()).name}")
+    else:
+        snapshot.descartar()
+
+def exportar_tabela(conexoes, tabela, pasta_saida, compressao='nenhuma', colunar=False):
+    """Exporta uma tabela usando uma conexão livre do pool; devolve (caminho, registros, aviso)"""
+    conn = conexoes.get()
+    try:
+        # Obter estrutura
+        estrutura = obter_estrutura_tabela(conn, tabela)
+        if not estrutura:
+            return None, 0, f"Não foi possível obter estrutura da tabela {tabela}"
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_arquivo = f"{tabela}_{timestamp}{EXTENSOES[compressao]}"
+        # O snapshot consulta os tipos antes do SELECT não bufferizado ocupar a conexão
+        snapshot = abrir_snapshot(conn, tabela, estrutura, pasta_saida, nome_arquivo) if colunar else None
+
+        # Obter dados (em lotes, direto do cursor)
+        colunas, lotes = obter_dados_tabela(conn, tabela)
+        if colunas is None:
+            if snapshot:
+                snapshot.descartar()
+            return None, 0, f"Não foi possível obter dados da tabela {tabela}"
+        if snapshot:
+            lotes = com_snapshot(lotes, snapshot)
+
+        # Criar arquivo SQL
+        caminho_arquivo, num_registros = criar_arquivo_sql(
+            tabela, estrutura, colunas, lotes, pasta_saida, nome_arquivo
+        )
+        if snapshot:
+            fechar_snapshot(snapshot, caminho_arquivo)
+        return caminho_arquivo, num_registros, None
+    finally:
+        conexoes.put(conn)
+
+def exportar_parte(conexoes, exportacao, indice):
+    """Exporta uma faixa da chave para o arquivo da parte e marca a parte como concluída no manifesto"""
+    manifesto = exportacao['manifesto']
+    tabela, chave = manifesto['tabela'], manifesto['chave']
+    parte = manifesto['partes'][indice]
+    if parte['fim'] is None:
+        filtro, parametros = f"WHERE {chave} >= %s", (parte['inicio'],)
+        descricao = f" (parte {indice + 1}: {chave} >= {parte['inicio']})"
+    else:
+        filtro, parametros = f"WHERE {chave} BETWEEN %s AND %s", (parte['inicio'], parte['fim'])
+        descricao = f" (parte {indice + 1}: {chave} de {parte['inicio']} a {parte['fim']})"
+
+    conn = conexoes.get()
+    try:
+        snapshot = None
+        if manifesto.get('colunar'):
+            snapshot = abrir_snapshot(conn, tabela, None, exportacao['pasta'], parte['arquivo'])
+        colunas, lotes = obter_dados_tabela(conn, tabela, filtro=filtro, parametros=parametros)
+        if colunas is None:
+            if snapshot:
+                snapshot.descartar()
+            return None, 0, f"Não foi possível obter dados da tabela {tabela}{descricao}"
+        if snapshot:
+            lotes = com_snapshot(lotes, snapshot)
+        caminho_arquivo, num_registros = criar_arquivo_sql(
+            tabela, None, colunas, lotes, exportacao['pasta'], parte['arquivo'], descricao
+        )
+        if snapshot:
+            fechar_snapshot(snapshot, caminho_arquivo)
+    finally:
+        conexoes.put(conn)
+
+    if caminho_arquivo:
+        with exportacao['trava']:
+            parte['status'] = 'concluida'
+            parte['registros'] = num_registros
+            if all(item['status'] == 'concluida' for item in manifesto['partes']):
+                manifesto['status'] = 'concluido'
+            salvar_manifesto(exportacao)
+    return caminho_arquivo, num_registros, None
+
+def main(jobs=1, linhas_por_parte=500000, retomar=False, compressao='nenhuma', colunar=False):
     """Função principal"""
     print("🔄 EXPORTADOR DE TABELAS MYSQL PARA SQL")
     print("=" * 50)
     print(f"📅 Data/Hora: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
 
-    # Conectar ao banco
-    conn = conectar_banco()
+    # Conectar ao banco (conexão principal + uma por job, todas do pool)
+    conn = conectar_banco() if preparar_pool(max(1, jobs) + 1) else None
     if not conn:
         print("❌ Falha na conexão com o banco de dados!")
         return
 
+    conexoes_exportacao = []
     try:
         # Criar pasta de saída
         pasta_saida = Path("scripts/sql_exports")
         pasta_saida.mkdir(exist_ok=True)
 
-        # Obter todas as tabelas
-        tabelas = obter_todas_tabelas(conn)
-        if not tabelas:
-            print("❌ Nenhuma tabela encontrada!")
+        # Tarefas: (descrição, função, argumentos), uma por tabela ou por parte de tabela
+        tarefas = []
+        if retomar:
+            exportacoes = carregar_exportacoes_incompletas(pasta_saida)
+            if not exportacoes:
+                print("✅ Nenhuma exportação em faixas pendente para retomar")
+                return
+            print("⚠️  As partes retomadas são lidas de um novo snapshot, não do snapshot original")
+            for exportacao in exportacoes:
+                partes = exportacao['manifesto']['partes']
+                pendentes = [i for i, parte in enumerate(partes) if parte['status'] != 'concluida']
+                print(f"Retomando {exportacao['pasta'].name}: {len(pendentes)} de {len(partes)} partes pendentes")
+                for indice in pendentes:
+                    descricao = f"{exportacao['manifesto']['tabela']} (parte {indice + 1}/{len(partes)})"
+                    tarefas.append((descricao, exportar_parte, (exportacao, indice)))
+            tabelas = []
+        else:
+            # Obter todas as tabelas, maiores primeiro para equilibrar as conexões
+            tabelas = obter_todas_tabelas(conn)
+            if not tabelas:
+                print("❌ Nenhuma tabela encontrada!")
+                return
+            estatisticas = obter_estatisticas_tabelas(conn)
+            tabelas = ordenar_por_tamanho(tabelas, estatisticas)
+
+            print(f"Encontradas {len(tabelas)} tabelas: {', '.join(tabelas)}")
+            print()
+
+            for tabela in tabelas:
+                linhas_estimadas = estatisticas.get(tabela, (0, 0))[1]
+                chave = None
+                if linhas_por_parte and linhas_estimadas > linhas_por_parte:
+                    chave = obter_chave_inteira(conn, tabela)
+                if not chave:
+                    tarefas.append((tabela, exportar_tabela, (tabela, pasta_saida, compressao, colunar)))
+                    continue
+
+                faixas = planejar_faixas(conn, tabela, chave, linhas_por_parte)
+                exportacao = iniciar_exportacao_em_faixas(conn, tabela, chave, faixas, pasta_saida, compressao,
+                                                          colunar)
+                if not exportacao:
+                    print(f"  ⚠️  Não foi possível exportar a estrutura da tabela {tabela}")
+                    continue
+                print(f"✂️  {tabela}: ~{linhas_estimadas} linhas em {len(faixas)} partes por {chave} "
+                      f"({exportacao['pasta'].name}/)")
+                for indice in range(len(faixas)):
+                    tarefas.append((f"{tabela} (parte {indice + 1}/{len(faixas)})", exportar_parte, (exportacao, indice)))
+            print()
+
+        # Conexões de exportação, todas no mesmo snapshot
+        conexoes_exportacao = abrir_conexoes_snapshot(conn, max(1, jobs))
+        if not conexoes_exportacao:
+            print("❌ Falha ao abrir as conexões de exportação!")
             return
-
-        print(f"Encontradas {len(tabelas)} tabelas: {', '.join(tabelas)}")
+        print(f"🔀 Exportando com {len(conexoes_exportacao)} conexão(ões) em snapshot consistente")
         print()
 
-        # Processar cada tabela
+        conexoes = queue.Queue()
+        for conexao in conexoes_exportacao:
+            conexoes.put(conexao)
+
+        # Processar as tabelas
         arquivos_criados = []
         total_registros = 0
 
-        for i, tabela in enumerate(tabelas, 1):
-            print(f"[{i}/{len(tabelas)}] Processando tabela: {tabela}")
-
-            # Obter estrutura
-            estrutura = obter_estrutura_tabela(conn, tabela)
-            if not estrutura:
-                print(f"  ⚠️  Não foi possível obter estrutura da tabela {tabela}")
-                continue
-
-            # Obter dados
-            colunas, dados = obter_dados_tabela(conn, tabela)
-            if colunas is None:
-                print(f"  ⚠️  Não foi possível obter dados da tabela {tabela}")
-                continue
-
-            # Criar arquivo SQL
-            caminho_arquivo, num_registros = criar_arquivo_sql(
-                tabela, estrutura, colunas, dados, pasta_saida
-            )
-
-            if caminho_arquivo:
-                print(f"  ✅ Arquivo criado: {caminho_arquivo.name}")
-                print(f"     - {num_registros} registros exportados")
-                arquivos_criados.append(caminho_arquivo.name)
-                total_registros += num_registros
-            else:
-                print(f"  ❌ Falha ao criar arquivo para {tabela}")
+        with ThreadPoolExecutor(max_workers=len(conexoes_exportacao)) as executor:
+            futuros = {
+                executor.submit(funcao, conexoes, *argumentos): descricao
+                for descricao, funcao, argumentos in tarefas
+            }
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                tabela = futuros[futuro]
+                print(f"[{i}/{len(tarefas)}] Tabela: {tabela}")
+                try:
+                    caminho_arquivo, num_registros, aviso = futuro.result()
+                except Exception as e:
+                    print(f"  ❌ Erro ao exportar {tabela}: {e}")
+                    continue
+
+                if aviso:
+                    print(f"  ⚠️  {aviso}")
+                elif caminho_arquivo:
+                    print(f"  ✅ Arquivo criado: {caminho_arquivo.name}")
+                    print(f"     - {num_registros} registros exportados")
+                    arquivos_criados.append(caminho_arquivo.relative_to(pasta_saida).as_posix())
+                    total_registros += num_registros
+                else:
+                    print(f"  ❌ Falha ao criar arquivo para {tabela}")
 
         # Resumo final
         print("\n📊 RESUMO DA EXPORTAÇÃO:")
-        print(f"   • Total de tabelas processadas: {len(tabelas)}")
+        if tabelas:
+            print(f"   • Total de tabelas processadas: {len(tabelas)}")
         print(f"   • Arquivos SQL criados: {len(arquivos_criados)}")
+        print(f"   • Total de registros exportados: {total_registros}")
         print(f"   • Localização dos arquivos: {pasta_saida}")
 
         if arquivos_criados:
@@ -196,9 +560,29 @@ def main():
         print(f"❌ Erro durante a exportação: {e}")
 
     finally:
+        for conexao in conexoes_exportacao:
+            conexao.close()
         if conn:
             conn.close()
             print("\n🔌 Conexão com banco fechada.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Exporta todas as tabelas do banco para arquivos SQL")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Tabelas exportadas em paralelo, cada uma em sua conexão (padrão: %(default)s)")
+    parser.add_argument('--linhas-por-parte', type=int, default=500000,
+                        help="Tabelas maiores que isso (com chave primária inteira) são exportadas em "
+                             "faixas da chave; 0 desliga (padrão: %(default)s)")
+    parser.add_argument('--retomar', action='store_true',
+                        help="Retoma as exportações em faixas interrompidas, refazendo só as partes pendentes")
+    parser.add_argument('--compressao', choices=compressoes_disponiveis(), default='nenhuma',
+                        help="Grava os arquivos comprimidos (.sql.gz / .sql.zst) (padrão: %(default)s)")
+    parser.add_argument('--colunar', action='store_true',
+                        help="Grava também um snapshot colunar de cada tabela (.parquet com pyarrow, "
+                             "senão .col); carregue com scripts/snapshot_colunar.py")
+    parser.add_argument('--profile', action='store_true',
+                        help="Grava relatórios do cProfile e do tracemalloc da execução em perfis/")
+    args = parser.parse_args()
+    with executar('export_database_sql', perfil=args.profile):
+        main(jobs=args.jobs, linhas_por_parte=args.linhas_por_parte, retomar=args.retomar,
+             compressao=args.compressao, colunar=args.colunar)
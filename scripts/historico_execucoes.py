@@ -0,0 +1,287 @@
+"""
+HISTÓRICO DAS EXECUÇÕES DE ETL
+==============================
+
+Cada execução dos scripts de carga, exportação e importação (metricas.executar)
+termina gravando:
+
+- uma linha na tabela etl_runs: script, arquivos de entrada (tamanho e hash por amostra),
+  registros lidos/parseados/gravados/rejeitados, tempo por etapa e
+  registros por segundo;
+- os mesmos números em formato textfile do Prometheus
+  (<ETL_TEXTFILE_DIR>/etl_<script>.prom), lido pelo textfile collector do
+  node exporter.
+
+O relatório compara a última execução de cada script com as anteriores e
+aponta quedas de vazão:
+
+    python scripts/historico_execucoes.py [--script process_fatex01] [--execucoes 10] [--tolerancia 0.2]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+import mysql.connector
+
+from db import conectar_banco
+
+# Pasta lida pelo textfile collector do node exporter (--collector.textfile.directory)
+PASTA_TEXTFILE = Path(os.getenv('ETL_TEXTFILE_DIR', 'prometheus'))
+
+# Bytes lidos do início e do fim de cada arquivo de entrada para o hash_entrada
+AMOSTRA_HASH = 1024 * 1024
+
+SQL_CRIAR_ETL_RUNS = """
+CREATE TABLE IF NOT EXISTS etl_runs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    script VARCHAR(64) NOT NULL,
+    iniciado_em DATETIME NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    duracao DOUBLE,
+    arquivos_entrada TEXT,
+    tamanho_entrada BIGINT,
+    hash_entrada CHAR(32),
+    linhas_lidas BIGINT,
+    registros_parseados BIGINT,
+    registros_gravados BIGINT,
+    registros_rejeitados BIGINT,
+    registros_por_segundo DOUBLE,
+    etapas JSON,
+    metricas JSON,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_script_iniciado (script, iniciado_em)
+)
+"""
+
+COLUNAS_ETL_RUNS = (
+    'script', 'iniciado_em', 'status', 'duracao', 'arquivos_entrada', 'tamanho_entrada', 'hash_entrada',
+    'linhas_lidas', 'registros_parseados', 'registros_gravados', 'registros_rejeitados',
+    'registros_por_segundo', 'etapas', 'metricas',
+)
+
+
+def hash_arquivos(caminhos):
+    """
+    Tamanho total e hash (32 caracteres hex) da entrada, na ordem dada. Para
+    não reler arquivos de vários GB depois da carga, cada arquivo entra no
+    hash pelo caminho, tamanho, data de modificação e pelos primeiros e
+    últimos AMOSTRA_HASH bytes: identifica o mesmo arquivo de entrada entre
+    execuções, não é uma verificação do conteúdo inteiro.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    tamanho = 0
+    for caminho in caminhos:
+        estado = os.stat(caminho)
+        digest.update(f"{os.path.basename(caminho)}\0{estado.st_size}\0{estado.st_mtime_ns}\0".encode())
+        with open(caminho, 'rb') as f:
+            digest.update(f.read(AMOSTRA_HASH))
+            if estado.st_size > AMOSTRA_HASH:
+                f.seek(max(AMOSTRA_HASH, estado.st_size - AMOSTRA_HASH))
+                digest.update(f.read(AMOSTRA_HASH))
+        tamanho += estado.st_size
+    return tamanho, digest.hexdigest()
+
+
+def montar_registro(resumo):
+    """Linha do etl_runs (dict coluna -> valor) a partir do resumo de metricas.Execucao"""
+    contadores = resumo['contadores']
+    entradas = [caminho for caminho in resumo['entradas'] if os.path.isfile(caminho)]
+    tamanho, hash_entrada = hash_arquivos(entradas) if entradas else (None, None)
+    # Carga: registros gravados (na carga via staging, só os das tabelas publicadas);
+    # exportação: registros exportados; importação: declarações
+    if 'registros_publicados' in contadores:
+        gravados = contadores['registros_publicados']
+    else:
+        gravados = (contadores.get('registros_gravados') or contadores.get('registros_exportados')
+                    or contadores.get('declaracoes_executadas', 0))
+    rejeitados = (contadores.get('linhas_rejeitadas', 0) + contadores.get('erros_gravacao', 0)
+                  + contadores.get('declaracoes_com_erro', 0))
+    return {
+        'script': resumo['script'],
+        'iniciado_em': datetime.fromisoformat(resumo['iniciado_em']),
+        'status': resumo['status'],
+        'duracao': resumo['duracao'],
+        'arquivos_entrada': ', '.join(os.path.basename(caminho) for caminho in entradas) or None,
+        'tamanho_entrada': tamanho,
+        'hash_entrada': hash_entrada,
+        'linhas_lidas': contadores.get('linhas_lidas'),
+        'registros_parseados': contadores.get('registros_parseados'),
+        'registros_gravados': gravados,
+        'registros_rejeitados': rejeitados,
+        'registros_por_segundo': gravados / resumo['duracao'] if resumo['duracao'] > 0 else 0.0,
+        'etapas': json.dumps(resumo['etapas']),
+        'metricas': json.dumps(resumo, default=str),
+    }
+
+
+def gravar_etl_runs(registro):
+    """Insere o registro no etl_runs (criando a tabela se preciso); devolve False se não gravar"""
+    conn = conectar_banco()
+    if not conn:
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_CRIAR_ETL_RUNS)
+        cursor.execute(
+            f"INSERT INTO etl_runs ({', '.join(COLUNAS_ETL_RUNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(COLUNAS_ETL_RUNS))})",
+            [registro[coluna] for coluna in COLUNAS_ETL_RUNS])
+        conn.commit()
+        return True
+    except mysql.connector.Error as err:
+        print(f"Aviso: execução não registrada em etl_runs ({err})")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _rotulos(**rotulos):
+    texto = ','.join(f'{nome}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for nome, valor in rotulos.items())
+    return '{' + texto + '}'
+
+
+def formatar_textfile(registro, resumo):
+    """Métricas da execução no formato de exposição do Prometheus (gauges da última execução)"""
+    script = registro['script']
+    linhas = []
+
+    def metrica(nome, ajuda, amostras):
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} gauge")
+        for rotulos, valor in amostras:
+            if valor is not None:
+                linhas.append(f"{nome}{_rotulos(script=script, **rotulos)} {float(valor)}")
+
+    metrica('etl_ultima_execucao_timestamp_segundos', "Início da última execução (epoch)",
+            [({}, registro['iniciado_em'].timestamp())])
+    metrica('etl_sucesso', "1 se a última execução terminou sem exceção",
+            [({}, 1 if registro['status'] == 'ok' else 0)])
+    metrica('etl_duracao_segundos', "Duração total da última execução",
+            [({}, registro['duracao'])])
+    metrica('etl_etapa_segundos', "Tempo da última execução em cada etapa",
+            [({'etapa': etapa}, segundos) for etapa, segundos in resumo['etapas'].items()])
+    metrica('etl_registros', "Registros da última execução por tipo",
+            [({'tipo': tipo}, registro[coluna]) for tipo, coluna in (
+                ('lidas', 'linhas_lidas'), ('parseados', 'registros_parseados'),
+                ('gravados', 'registros_gravados'), ('rejeitados', 'registros_rejeitados'))])
+    metrica('etl_rejeicoes', "Linhas rejeitadas da última execução por motivo (rejeitos.py)",
+            [({'motivo': nome.split('.', 1)[1]}, quantidade)
+             for nome, quantidade in resumo['contadores'].items() if nome.startswith('rejeitadas.')])
+    metrica('etl_registros_por_segundo', "Vazão da última execução (registros gravados por segundo)",
+            [({}, registro['registros_por_segundo'])])
+    metrica('etl_entrada_bytes', "Tamanho dos arquivos de entrada da última execução",
+            [({}, registro['tamanho_entrada'])])
+    if resumo['pico_rss_mb'] is not None:
+        metrica('etl_pico_rss_bytes', "Pico de memória residente da última execução",
+                [({}, resumo['pico_rss_mb'] * 1024 * 1024)])
+    return '\n'.join(linhas) + '\n'
+
+
+def gravar_textfile(registro, resumo, pasta=PASTA_TEXTFILE):
+    """Grava <pasta>/etl_<script>.prom de forma atômica (o collector nunca lê o arquivo pela metade)"""
+    pasta.mkdir(parents=True, exist_ok=True)
+    caminho = pasta / f"etl_{registro['script']}.prom"
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    temporario.write_text(formatar_textfile(registro, resumo), encoding='utf-8')
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def registrar_execucao(resumo):
+    """Chamado por metricas.executar no fim de cada execução: etl_runs + textfile do Prometheus"""
+    try:
+        registro = montar_registro(resumo)
+        caminho = gravar_textfile(registro, resumo)
+    except OSError as err:
+        print(f"Aviso: histórico da execução não gravado ({err})")
+        return
+    if gravar_etl_runs(registro):
+        print(f"Execução registrada em etl_runs e em {caminho}")
+    else:
+        print(f"Execução registrada em {caminho}")
+
+
+def obter_execucoes(conn, script=None, limite=10):
+    """Últimas 'limite' execuções concluídas de cada script, da mais antiga para a mais nova"""
+    filtro, parametros = ("AND script = %s", (script, limite)) if script else ("", (limite,))
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"SELECT * FROM ("
+            f"  SELECT script, iniciado_em, duracao, tamanho_entrada, registros_gravados, registros_por_segundo,"
+            f"         ROW_NUMBER() OVER (PARTITION BY script ORDER BY iniciado_em DESC) AS ordem"
+            f"  FROM etl_runs WHERE status = 'ok' {filtro}"
+            f") recentes WHERE ordem <= %s ORDER BY script, iniciado_em",
+            parametros)
+        execucoes = {}
+        for linha in cursor.fetchall():
+            execucoes.setdefault(linha['script'], []).append(linha)
+        return execucoes
+    finally:
+        cursor.close()
+
+
+def imprimir_relatorio(execucoes, tolerancia=0.2):
+    """Tabela das execuções de cada script e alerta quando a última fica abaixo da mediana das anteriores"""
+    regressoes = 0
+    for script, linhas in execucoes.items():
+        print(f"\n{script}")
+        print(f"  {'Início':<19} {'Duração (s)':>12} {'Entrada (MB)':>13} {'Registros':>11} "
+              f"{'Registros/s':>12} {'MB/s':>8}")
+        for linha in linhas:
+            tamanho_mb = (linha['tamanho_entrada'] or 0) / (1024 * 1024)
+            mb_por_segundo = tamanho_mb / linha['duracao'] if linha['duracao'] else 0.0
+            print(f"  {linha['iniciado_em']:%Y-%m-%d %H:%M:%S} {linha['duracao']:>12.2f} {tamanho_mb:>13.1f} "
+                  f"{linha['registros_gravados'] or 0:>11} {linha['registros_por_segundo'] or 0:>12.0f} "
+                  f"{mb_por_segundo:>8.1f}")
+        if len(linhas) < 2:
+            continue
+        # Vazão (registros/s) e não duração: o arquivo cresce e a duração cresce junto
+        referencia = statistics.median(linha['registros_por_segundo'] or 0 for linha in linhas[:-1])
+        ultima = linhas[-1]['registros_por_segundo'] or 0
+        if referencia and ultima < referencia * (1 - tolerancia):
+            regressoes += 1
+            print(f"  ⚠️  Regressão: {ultima:.0f} registros/s na última execução contra mediana de "
+                  f"{referencia:.0f} nas {len(linhas) - 1} anteriores ({ultima / referencia - 1:+.0%})")
+    return regressoes
+
+
+def main(script=None, execucoes=10, tolerancia=0.2):
+    """Relatório de vazão das últimas execuções registradas em etl_runs"""
+    conn = conectar_banco()
+    if not conn:
+        return 1
+    try:
+        historico = obter_execucoes(conn, script, execucoes)
+    except mysql.connector.Error as err:
+        print(f"Erro ao ler etl_runs: {err}")
+        return 1
+    finally:
+        conn.close()
+    if not historico:
+        print("Nenhuma execução registrada em etl_runs")
+        return 0
+    regressoes = imprimir_relatorio(historico, tolerancia)
+    print(f"\n{regressoes} script(s) com regressão de vazão acima de {tolerancia:.0%}" if regressoes
+          else "\nSem regressões de vazão")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mostra as últimas execuções de ETL e as regressões de vazão")
+    parser.add_argument('--script', help="Só este script (ex.: process_fatex01)")
+    parser.add_argument('--execucoes', type=int, default=10,
+                        help="Execuções mais recentes consideradas por script (padrão: %(default)s)")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Queda de vazão, em relação à mediana das anteriores, considerada "
+                             "regressão (padrão: %(default)s)")
+    args = parser.parse_args()
+    raise SystemExit(main(args.script, args.execucoes, args.tolerancia))
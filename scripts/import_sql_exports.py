@@ -1,66 +1,262 @@
+"""
+IMPORTADOR DOS DUMPS DE sql_exports
+===================================
+
+Importa os dumps gerados pelo export_database_sql.py (.sql, .sql.gz, .sql.zst
+e as pastas de exportação em faixas com manifest.json). Quando há vários
+dumps da mesma tabela, só o mais recente (ou o mais recente até --ate) é
+importado.
+
+Com --rapido o restore usa, em cada conexão, unique_checks e
+foreign_key_checks desligados e sql_log_bin=0; cada tabela é gravada em uma
+única transação e os índices secundários só são criados depois dos dados.
+Com --jobs N várias tabelas são restauradas em paralelo, cada uma em sua
+conexão, das maiores para as menores.
+"""
+
+import argparse
+import json
 import os
-from dotenv import load_dotenv
+import queue
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
 import mysql.connector
 
-# Carregar variáveis de ambiente do arquivo .env na raiz do projeto
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+from db import conectar_banco, preparar_pool
+from dump_sql import abrir_dump, eh_dump, ler_declaracoes, separar_indices_secundarios
+from metricas import atual, executar
 
-# Configuração do banco de dados
-db_config = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'database': os.getenv('DB_NAME', 'datalake'),
-}
+RE_CREATE_TABLE = re.compile(r'CREATE TABLE `([^`]+)`')
+# <tabela>_<AAAAMMDD_HHMMSS> seguido da extensão do dump (ou nome da pasta em faixas)
+RE_NOME_DUMP = re.compile(r'^(.+)_(\d{8}_\d{6})(?:\.sql(?:\.gz|\.zst)?)?$')
 
-try:
-    # Conectar ao banco de dados
-    conn = mysql.connector.connect(**db_config)
-    cursor = conn.cursor()
+# Timestamp dos nomes dos dumps (o mesmo usado pelo export_database_sql.py)
+FORMATO_TIMESTAMP = '%Y%m%d_%H%M%S'
 
-    # Diretório dos arquivos SQL
-    sql_dir = os.path.join(os.path.dirname(__file__), 'sql_exports')
+# Diretório dos arquivos SQL
+sql_dir = os.path.join(os.path.dirname(__file__), 'sql_exports')
 
-    # Processar cada arquivo .sql
-    for file_name in os.listdir(sql_dir):
-        if file_name.endswith('.sql'):
-            file_path = os.path.join(sql_dir, file_name)
-            print(f'Importando {file_name}...')
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                sql_content = f.read()
+def instante_limite(texto):
+    """
+    Interpreta '--ate': 'AAAAMMDD_HHMMSS' ou só a data 'AAAAMMDD' (até o fim
+    daquele dia); devolve um datetime
+    """
+    try:
+        return datetime.strptime(texto, FORMATO_TIMESTAMP)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(texto, '%Y%m%d').replace(hour=23, minute=59, second=59)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"instante inválido: {texto!r} (use AAAAMMDD_HHMMSS ou AAAAMMDD)") from None
 
-            # Extrair o nome da tabela do CREATE TABLE
-            import re
-            match = re.search(r'CREATE TABLE `([^`]+)`', sql_content)
-            if match:
-                table_name = match.group(1)
-                try:
-                    cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
-                    print(f'Tabela {table_name} removida se existia.')
-                except mysql.connector.Error as e:
-                    print(f'Erro ao remover tabela {table_name}: {e}')
-
-            # Executar múltiplas declarações SQL
-            statements = sql_content.split(';')
-            for stmt in statements:
-                stmt = stmt.strip()
-                if stmt:
+
+def listar_importacoes(pasta, ate=None):
+    """
+    Lista (nome, [arquivos]) a importar: cada dump solto é uma importação e
+    cada pasta de exportação em faixas vira uma só (estrutura e depois as
+    partes, na ordem do manifesto). De cada tabela entra só o dump mais
+    recente (ou o mais recente até o datetime 'ate'); os demais são
+    ignorados. Maiores primeiro, para equilibrar as conexões.
+    """
+    candidatos = {}
+    for file_name in sorted(os.listdir(pasta)):
+        file_path = os.path.join(pasta, file_name)
+        manifest_path = os.path.join(file_path, 'manifest.json')
+        if eh_dump(file_name):
+            arquivos = [file_path]
+        elif os.path.isfile(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            if manifesto.get('status') != 'concluido':
+                print(f'Ignorando {file_name}: exportação incompleta (use --retomar no exportador)')
+                continue
+            arquivos = [manifesto['estrutura']] + [parte['arquivo'] for parte in manifesto['partes']]
+            arquivos = [os.path.join(file_path, arquivo) for arquivo in arquivos]
+        else:
+            continue
+
+        match = RE_NOME_DUMP.match(file_name)
+        tabela, timestamp = match.groups() if match else (file_name, '')
+        # Mesmo formato de largura fixa: a comparação de texto segue a ordem cronológica
+        if ate and timestamp and timestamp > ate.strftime(FORMATO_TIMESTAMP):
+            continue
+        candidatos.setdefault(tabela, []).append((timestamp, file_name, arquivos))
+
+    importacoes = []
+    for tabela, dumps in candidatos.items():
+        dumps.sort()
+        _, file_name, arquivos = dumps[-1]
+        if len(dumps) > 1:
+            print(f'{tabela}: importando {file_name}, {len(dumps) - 1} dump(s) mais antigo(s) ignorado(s)')
+        importacoes.append((file_name, arquivos))
+
+    importacoes.sort(key=lambda item: sum(os.path.getsize(arquivo) for arquivo in item[1]), reverse=True)
+    return importacoes
+
+
+def importar_tabela(conn, nome, arquivos, rapido=False):
+    """
+    Importa os arquivos de uma tabela e devolve (declarações executadas, erros).
+    No modo rápido os dados entram em uma única transação e os índices
+    secundários do CREATE TABLE são criados depois, em um único ALTER TABLE.
+    """
+    execucao = atual()
+    cursor = conn.cursor()
+    executadas = 0
+    erros = 0
+    indices_adiados = {}
+    try:
+        for file_path in arquivos:
+            execucao.contar('bytes_lidos', os.path.getsize(file_path))
+            # .sql, .sql.gz ou .sql.zst, lido em streaming: uma declaração por vez na memória
+            with abrir_dump(file_path) as f:
+                for stmt in ler_declaracoes(f):
+                    # Antes do CREATE TABLE, remover a tabela se já existir
+                    match = RE_CREATE_TABLE.match(stmt)
+                    if match:
+                        table_name = match.group(1)
+                        try:
+                            cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+                            print(f'Tabela {table_name} removida se existia.')
+                        except mysql.connector.Error as e:
+                            print(f'Erro ao remover tabela {table_name}: {e}')
+                        if rapido:
+                            stmt, indices = separar_indices_secundarios(stmt)
+                            if indices:
+                                indices_adiados[table_name] = indices
+
+                    inicio = time.perf_counter()
                     try:
                         cursor.execute(stmt)
+                        executadas += 1
                     except mysql.connector.Error as e:
-                        print(f'Erro na declaração: {e}')
+                        print(f'Erro na declaração ({nome}): {e}')
+                        erros += 1
                         continue
+                    finally:
+                        execucao.observar('declaracao', time.perf_counter() - inicio)
 
-    # Confirmar mudanças
-    conn.commit()
-    print('Todos os arquivos SQL foram processados.')
+        # Confirmar mudanças (no modo rápido, a transação única da tabela)
+        with execucao.etapa('commit'):
+            conn.commit()
 
-except mysql.connector.Error as e:
-    print(f'Erro de conexão ao banco de dados: {e}')
-
-finally:
-    if 'cursor' in locals():
+        for table_name, indices in indices_adiados.items():
+            inicio = time.perf_counter()
+            try:
+                cursor.execute(f"ALTER TABLE `{table_name}` " + ', '.join(f"ADD {indice}" for indice in indices))
+                print(f'Índices de {table_name} criados em {time.perf_counter() - inicio:.2f}s')
+            except mysql.connector.Error as e:
+                print(f'Erro ao criar índices de {table_name}: {e}')
+                erros += 1
+            execucao.somar_etapa('indices', time.perf_counter() - inicio)
+    except Exception:
+        # Inclui dump corrompido: a conexão volta para as outras tabelas sem a transação pela metade
+        conn.rollback()
+        raise
+    finally:
         cursor.close()
-    if 'conn' in locals():
-        conn.close()
+    execucao.contar('declaracoes_executadas', executadas)
+    execucao.contar('declaracoes_com_erro', erros)
+    return executadas, erros
+
+
+def importar_com_conexao(conexoes, nome, arquivos, rapido):
+    """Executado nas threads: importa uma tabela usando uma conexão livre"""
+    conn = conexoes.get()
+    try:
+        with atual().etapa('importacao'):
+            return importar_tabela(conn, nome, arquivos, rapido)
+    finally:
+        conexoes.put(conn)
+
+
+def main(jobs=1, rapido=False, ate=None):
+    """Função principal"""
+    importacoes = listar_importacoes(sql_dir, ate)
+    if not importacoes:
+        print(f'Nenhum dump encontrado em {sql_dir}')
+        return
+    for _, arquivos in importacoes:
+        for file_path in arquivos:
+            atual().registrar_entrada(file_path)
+
+    abertas = []
+    try:
+        # Conectar ao banco de dados (uma conexão do pool por importação simultânea;
+        # no modo rápido com o perfil de sessão 'restauracao' do db.py)
+        quantidade = max(1, min(jobs, len(importacoes)))
+        if not preparar_pool(quantidade):
+            atual().falhar('sem conexão com o banco')
+            return
+        for _ in range(quantidade):
+            conn = conectar_banco(perfil='restauracao' if rapido else 'padrao')
+            if not conn:
+                break
+            abertas.append(conn)
+        if not abertas:
+            atual().falhar('sem conexão com o banco')
+            return
+        conexoes = queue.Queue()
+        for conn in abertas:
+            conexoes.put(conn)
+
+        print(f'Importando {len(importacoes)} dumps com {len(abertas)} conexão(ões)'
+              f'{" em modo rápido" if rapido else ""}...')
+        inicio = time.perf_counter()
+        falhas = []
+        with ThreadPoolExecutor(max_workers=len(abertas)) as executor:
+            futuros = {
+                executor.submit(importar_com_conexao, conexoes, nome, arquivos, rapido): nome
+                for nome, arquivos in importacoes
+            }
+            for futuro in as_completed(futuros):
+                nome = futuros[futuro]
+                try:
+                    executadas, erros = futuro.result()
+                except Exception as e:
+                    # Erro do banco ou dump corrompido (.gz/.zst truncado: EOFError, OSError, ZstdError);
+                    # as outras tabelas continuam
+                    print(f'Erro ao importar {nome}: {type(e).__name__}: {e}')
+                    falhas.append(nome)
+                    atual().falhar(f'{nome}: {type(e).__name__}: {e}')
+                    continue
+                print(f'Importado {nome}: {executadas} declarações'
+                      f'{f", {erros} com erro" if erros else ""}')
+
+        print(f'Todos os arquivos SQL foram processados em {time.perf_counter() - inicio:.2f}s.')
+        if falhas:
+            print(f'{len(falhas)} dump(s) não importado(s): {", ".join(falhas)}')
+
+    except mysql.connector.Error as e:
+        print(f'Erro de conexão ao banco de dados: {e}')
+        atual().falhar(f'conexão: {e}')
+
+    finally:
+        for conn in abertas:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa os dumps de scripts/sql_exports")
+    parser.add_argument('--rapido', action='store_true',
+                        help="Restore rápido: sem unique/foreign key checks e sem binlog na sessão, "
+                             "uma transação por tabela e índices secundários criados depois dos dados")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Tabelas importadas em paralelo, cada uma em sua conexão (padrão: %(default)s)")
+    parser.add_argument('--ate', metavar='AAAAMMDD_HHMMSS', type=instante_limite,
+                        help="Usa, de cada tabela, o dump mais recente até este instante; só a data (AAAAMMDD) "
+                             "vale até o fim do dia (padrão: o mais recente de todos)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Grava relatórios do cProfile e do tracemalloc da execução em perfis/")
+    args = parser.parse_args()
+    with executar('import_sql_exports', perfil=args.profile) as execucao:
+        main(jobs=args.jobs, rapido=args.rapido, ate=args.ate)
+    # Alguma tabela não foi importada: o código de saída avisa o agendador
+    if execucao.status != 'ok':
+        sys.exit(1)
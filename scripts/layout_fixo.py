@@ -0,0 +1,123 @@
+"""
+PARSER DE RELATÓRIOS EM LARGURA FIXA
+====================================
+
+Motor único para os relatórios TXT do mainframe (confec01, fatex01, estsc01,
+tecido01). Cada relatório é descrito por uma lista de campos (nome, início,
+fim, tipo); o layout é compilado uma vez em uma função extratora gerada
+(como faz o namedtuple), que recorta e converte todos os campos de uma
+linha em uma única expressão e devolve uma tupla na ordem das colunas.
+"""
+
+from collections import namedtuple
+
+from conversores import converter_data, converter_decimal
+
+# inicio=None indica campo calculado: 'tipo' é então uma função que recebe a linha inteira
+Campo = namedtuple('Campo', ['nome', 'inicio', 'fim', 'tipo'])
+
+# Tipos de campo convertidos (conversores.py); 'texto' fica como recortado
+CONVERSORES = {
+    'decimal': converter_decimal,
+    'data': converter_data,
+}
+
+# Motivo de rejeição (rejeitos.py) de um campo convertido cujo texto não converte
+MOTIVOS_REJEICAO = {
+    'decimal': 'numero_invalido',
+    'data': 'data_invalida',
+}
+
+
+class LayoutFixo:
+    """Layout compilado de um relatório em largura fixa"""
+
+    def __init__(self, nome, campos, linha_valida, prefixos_ignorados=(), trechos_ignorados=()):
+        self.nome = nome
+        self.campos = tuple(campos)
+        self.colunas = tuple(campo.nome for campo in self.campos)
+        self.linha_valida = linha_valida
+        self.prefixos_ignorados = tuple(prefixos_ignorados)
+        self.trechos_ignorados = tuple(trechos_ignorados)
+
+        self.extrair = self._compilar()
+        self.tem_campo_nulo = self._compilar_verificacao()
+
+    def _compilar(self):
+        """Gera a função extrair(line) com as fatias e conversões fixas no código"""
+        namespace = {}
+        expressoes = []
+        for indice, campo in enumerate(self.campos):
+            if campo.inicio is None:
+                namespace[f'_calc{indice}'] = campo.tipo
+                expressoes.append(f'_calc{indice}(line)')
+                continue
+            fatia = f'line[{campo.inicio}:{campo.fim}].strip()'
+            if campo.tipo in CONVERSORES:
+                namespace[f'_conv{indice}'] = CONVERSORES[campo.tipo]
+                fatia = f'_conv{indice}({fatia})'
+            elif campo.tipo != 'texto':
+                raise ValueError(f"Tipo de campo desconhecido em {self.nome}.{campo.nome}: {campo.tipo}")
+            expressoes.append(fatia)
+
+        codigo = f"def extrair(line):\n    return ({', '.join(expressoes)},)\n"
+        exec(compile(codigo, f'<layout {self.nome}>', 'exec'), namespace)
+        extrair = namespace['extrair']
+        extrair.__doc__ = "Recorta e converte os campos de uma linha já aceita"
+        return extrair
+
+    def _compilar_verificacao(self):
+        """Gera tem_campo_nulo(valores): 'is None' só nos campos convertidos (mais barato que None in valores)"""
+        testes = [f'valores[{indice}] is None' for indice, campo in enumerate(self.campos)
+                  if campo.inicio is not None and campo.tipo in MOTIVOS_REJEICAO]
+        codigo = f"def tem_campo_nulo(valores):\n    return {' or '.join(testes) or 'False'}\n"
+        namespace = {}
+        exec(compile(codigo, f'<layout {self.nome}>', 'exec'), namespace)
+        return namespace['tem_campo_nulo']
+
+    def aceita(self, line):
+        """Indica se a linha (já sem espaços à direita) é um registro de dados"""
+        if not line:
+            return False
+        if self.prefixos_ignorados and line.startswith(self.prefixos_ignorados):
+            return False
+        for trecho in self.trechos_ignorados:
+            if trecho in line:
+                return False
+        return self.linha_valida(line)
+
+    def parse(self, line):
+        """Faz o parse de uma linha do relatório; devolve uma tupla ou None"""
+        line = line.rstrip()
+        if not self.aceita(line):
+            return None
+        return self.extrair(line)
+
+    def validar(self, line, valores):
+        """
+        Motivo de rejeição ('numero_invalido:qtde') de um registro já
+        extraído, ou None se é válido: um campo convertido que ficou None
+        tendo texto. Só precisa ser chamado quando tem_campo_nulo(valores).
+        """
+        line = line.rstrip()
+        for campo, valor in zip(self.campos, valores):
+            if (valor is None and campo.inicio is not None and campo.tipo in MOTIVOS_REJEICAO
+                    and line[campo.inicio:campo.fim].strip()):
+                return f"{MOTIVOS_REJEICAO[campo.tipo]}:{campo.nome}"
+        return None
+
+    def parse_dict(self, line):
+        """Mesmo que parse(), mas devolve um dict coluna -> valor"""
+        valores = self.parse(line)
+        if valores is None:
+            return None
+        return dict(zip(self.colunas, valores))
+
+    def parse_arquivo(self, linhas):
+        """Gera as tuplas de todos os registros válidos de um iterável de linhas"""
+        aceita = self.aceita
+        extrair = self.extrair
+        for line in linhas:
+            line = line.rstrip()
+            if aceita(line):
+                yield extrair(line)
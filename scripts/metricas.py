@@ -0,0 +1,292 @@
+"""
+MÉTRICAS DAS EXECUÇÕES
+======================
+
+Camada leve de medição compartilhada pelos scripts de carga, exportação e
+importação: tempo por etapa, contadores (linhas lidas, registros gravados,
+bytes lidos/escritos...), histogramas de latência (gravação de cada lote,
+execução de cada declaração) e pico de memória (RSS). No fim da execução
+o resumo é impresso em JSON e registrado no histórico (etl_runs e textfile
+do Prometheus, ver historico_execucoes.py).
+
+Os módulos compartilhados registram nas métricas da execução atual
+(atual()); fora de uma execução os registros são descartados. Com
+--profile a execução também grava um relatório do cProfile (todas as
+threads) e do tracemalloc em perfis/.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage, o pico de RSS não é informado
+    resource = None
+
+# Limites superiores (segundos) das faixas dos histogramas de latência
+FAIXAS_LATENCIA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf'))
+
+PASTA_PERFIS = Path('perfis')
+
+
+def pico_rss_mb(filhos=False):
+    """Pico de memória residente (do processo ou do maior processo filho), em MB; None sem resource"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_CHILDREN if filhos else resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+class Histograma:
+    """Contagem por faixa de latência, com soma e máximo"""
+
+    def __init__(self):
+        self.faixas = [0] * len(FAIXAS_LATENCIA)
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, segundos):
+        for indice, limite in enumerate(FAIXAS_LATENCIA):
+            if segundos <= limite:
+                self.faixas[indice] += 1
+                break
+        self.contagem += 1
+        self.soma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def resumo(self):
+        return {
+            'contagem': self.contagem,
+            'soma': round(self.soma, 6),
+            'media': round(self.soma / self.contagem, 6) if self.contagem else 0.0,
+            'maximo': round(self.maximo, 6),
+            'faixas': {
+                ('+inf' if limite == float('inf') else f"<={limite:g}s"): quantidade
+                for limite, quantidade in zip(FAIXAS_LATENCIA, self.faixas)
+            },
+        }
+
+
+class Execucao:
+    """Métricas de uma execução de script (seguras para uso em várias threads)"""
+
+    def __init__(self, script):
+        self.script = script
+        self.iniciado_em = datetime.now()
+        self.inicio = time.perf_counter()
+        self.etapas = Counter()
+        self.contadores = Counter()
+        self.histogramas = {}
+        self.entradas = []
+        self.status = 'ok'
+        self.falhas = []
+        self._lock = threading.Lock()
+
+    def somar_etapa(self, etapa, segundos):
+        with self._lock:
+            self.etapas[etapa] += segundos
+
+    @contextmanager
+    def etapa(self, nome):
+        """Cronometra o bloco e soma o tempo na etapa (somado entre threads)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar_etapa(nome, time.perf_counter() - inicio)
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self.contadores[nome] += quantidade
+
+    def registrar_entrada(self, caminho):
+        """Arquivo de entrada da execução (tamanho e hash vão para o histórico)"""
+        with self._lock:
+            self.entradas.append(str(caminho))
+
+    def falhar(self, motivo):
+        """Marca a execução como falha (ex.: um arquivo do process_all que não foi carregado)"""
+        with self._lock:
+            self.status = 'erro'
+            self.falhas.append(motivo)
+
+    def observar(self, nome, segundos):
+        """Registra uma latência no histograma 'nome' e soma o tempo na etapa de mesmo nome"""
+        with self._lock:
+            histograma = self.histogramas.get(nome)
+            if histograma is None:
+                histograma = self.histogramas[nome] = Histograma()
+            histograma.observar(segundos)
+            self.etapas[nome] += segundos
+
+    def resumo(self):
+        duracao = time.perf_counter() - self.inicio
+        with self._lock:
+            etapas = dict(self.etapas)
+            # Na carga as linhas são lidas e parseadas sob demanda pelo gravador: o tempo da
+            # carga que não foi gravação (nem leitura da tabela atual, no delta) é
+            # leitura + parse + conversão (+ hash / TSV). No pipeline a produtora mede o
+            # próprio tempo, que corre em paralelo com a gravação
+            if 'carga' in etapas and 'gravacao_lote' in etapas and 'leitura_parse' not in etapas:
+                etapas['leitura_parse'] = max(0.0, etapas['carga'] - etapas['gravacao_lote']
+                                              - etapas.get('leitura_snapshot', 0.0))
+            # Exportação: o que não foi espera pelo banco é formatação e escrita dos INSERT
+            if 'exportacao_arquivo' in etapas and 'leitura_lote' in etapas:
+                etapas['escrita_arquivo'] = max(0.0, etapas['exportacao_arquivo'] - etapas['leitura_lote'])
+            # Importação: o que não foi execução no banco é leitura e separação das declarações
+            if 'importacao' in etapas and 'declaracao' in etapas:
+                etapas['leitura_dump'] = max(0.0, etapas['importacao'] - etapas['declaracao']
+                                             - etapas.get('commit', 0.0) - etapas.get('indices', 0.0))
+            return {
+                'script': self.script,
+                'iniciado_em': self.iniciado_em.isoformat(timespec='seconds'),
+                'status': self.status,
+                'falhas': list(self.falhas),
+                'duracao': round(duracao, 6),
+                'entradas': list(self.entradas),
+                'etapas': {nome: round(segundos, 6) for nome, segundos in sorted(etapas.items())},
+                'contadores': dict(sorted(self.contadores.items())),
+                'histogramas': {nome: h.resumo() for nome, h in sorted(self.histogramas.items())},
+                'pico_rss_mb': pico_rss_mb(),
+                'pico_rss_filhos_mb': pico_rss_mb(filhos=True),
+            }
+
+
+class _ExecucaoNula(Execucao):
+    """Execução usada fora de executar(): aceita os registros e não guarda nada"""
+
+    def somar_etapa(self, etapa, segundos):
+        pass
+
+    def contar(self, nome, quantidade=1):
+        pass
+
+    def registrar_entrada(self, caminho):
+        pass
+
+    def falhar(self, motivo):
+        pass
+
+    def observar(self, nome, segundos):
+        pass
+
+
+_NULA = _ExecucaoNula('')
+_atual = None
+
+
+def atual():
+    """Métricas da execução em andamento (ou uma execução nula)"""
+    return _atual or _NULA
+
+
+class _PerfilThreads:
+    """
+    cProfile da thread principal e de todas as threads criadas durante a
+    execução. No Python 3.12+ o cProfile usa o sys.monitoring, que vale para
+    o interpretador inteiro: um único perfil já cobre todas as threads e um
+    segundo enable() levanta ValueError.
+    """
+
+    POR_THREAD = sys.version_info < (3, 12)
+
+    def __init__(self):
+        self.perfis = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def _iniciar_na_thread(self, *_):
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro profiler ativo: a thread segue sem perfil próprio (nunca morre por causa do perfil)
+            return
+        with self._lock:
+            self.perfis.append(perfil)
+
+    def iniciar(self):
+        if self.POR_THREAD:
+            threading.setprofile(self._iniciar_na_thread)
+        self.perfis[0].enable()
+
+    def parar(self):
+        self.perfis[0].disable()
+        if self.POR_THREAD:
+            threading.setprofile(None)
+        estatisticas = pstats.Stats(self.perfis[0])
+        with self._lock:
+            extras = self.perfis[1:]
+        for perfil in extras:
+            perfil.disable()
+            estatisticas.add(perfil)
+        return estatisticas
+
+
+def _gravar_perfil(script, estatisticas, memoria, pico_memoria):
+    """Grava <script>_<timestamp>.prof (pstats) e .txt (funções e alocações mais caras)"""
+    PASTA_PERFIS.mkdir(exist_ok=True)
+    base = PASTA_PERFIS / f"{script}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    estatisticas.dump_stats(f"{base}.prof")
+
+    texto = io.StringIO()
+    estatisticas.stream = texto
+    texto.write("=== cProfile: 40 funções com maior tempo acumulado ===\n")
+    estatisticas.sort_stats('cumulative').print_stats(40)
+    texto.write("=== cProfile: 40 funções com maior tempo próprio ===\n")
+    estatisticas.sort_stats('tottime').print_stats(40)
+    texto.write(f"=== tracemalloc: pico de {pico_memoria / (1024 * 1024):.1f} MB alocados pelo Python; "
+                f"30 linhas com mais memória ainda alocada no fim ===\n")
+    for estatistica in memoria.statistics('lineno')[:30]:
+        texto.write(f"{estatistica}\n")
+    Path(f"{base}.txt").write_text(texto.getvalue(), encoding='utf-8')
+    print(f"Perfil gravado em {base}.prof e {base}.txt")
+
+
+@contextmanager
+def executar(script, perfil=False):
+    """
+    Delimita a execução de um script: as métricas registradas dentro do
+    bloco são impressas em JSON no fim e gravadas no histórico de
+    execuções; com perfil=True grava também os relatórios do cProfile e do
+    tracemalloc
+    """
+    global _atual
+    execucao = _atual = Execucao(script)
+    perfis = None
+    if perfil:
+        tracemalloc.start()
+        perfis = _PerfilThreads()
+        perfis.iniciar()
+    try:
+        yield execucao
+    except BaseException as erro:
+        execucao.falhar(f"{type(erro).__name__}: {erro}")
+        raise
+    finally:
+        if perfis is not None:
+            estatisticas = perfis.parar()
+            memoria = tracemalloc.take_snapshot()
+            _, pico_memoria = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _gravar_perfil(script, estatisticas, memoria, pico_memoria)
+        _atual = None
+        resumo = execucao.resumo()
+        print("\nMétricas da execução:")
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+        # Importado aqui: o histórico depende do banco (db.py) e as métricas não
+        from historico_execucoes import registrar_execucao
+        registrar_execucao(resumo)
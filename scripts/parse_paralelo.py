@@ -0,0 +1,148 @@
+"""
+PARSE PARALELO DE RELATÓRIOS GRANDES
+====================================
+
+Divide um relatório em blocos de bytes alinhados em quebras de linha e faz o
+parse de cada bloco em um processo separado, com o mesmo layout usado pelos
+parse_line_*. Os resultados são devolvidos na ordem original do arquivo.
+"""
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import metricas
+from parse_vetorizado import parse_em_lotes
+from relatorios_estoque import RELATORIOS
+
+TAMANHO_BLOCO_PADRAO = 8 * 1024 * 1024
+
+
+def dividir_em_blocos(caminho, partes=1, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Divide o arquivo em intervalos (inicio, fim) de bytes, cada um terminando
+    logo após um '\\n'. Gera pelo menos 'partes' blocos quando o arquivo permite.
+    """
+    tamanho = os.path.getsize(caminho)
+    if tamanho == 0:
+        return []
+    quantidade = max(partes, -(-tamanho // tamanho_bloco))
+    passo = max(1, tamanho // quantidade)
+
+    blocos = []
+    inicio = 0
+    with open(caminho, 'rb') as f:
+        while inicio < tamanho:
+            alvo = inicio + passo
+            if alvo >= tamanho:
+                fim = tamanho
+            else:
+                f.seek(alvo)
+                f.readline()
+                fim = f.tell()
+            blocos.append((inicio, fim))
+            inicio = fim
+    return blocos
+
+
+def parse_bloco(nome_relatorio, caminho, inicio, fim, validar=False, motor='linha', descartar=True):
+    """
+    Executado no processo filho: devolve (linhas lidas, tuplas parseadas,
+    rejeitadas) do bloco. Com validar=True os registros com campo inválido
+    vão para rejeitadas como (linha no bloco, motivo, texto) e, com
+    descartar=True, saem das tuplas (senão seguem com NULL no campo).
+    motor='vetorizado' usa o parse_vetorizado (requer numpy).
+    """
+    layout = RELATORIOS[nome_relatorio].layout
+    parse = layout.parse
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        dados = f.read(fim - inicio)
+
+    linhas_lidas = 0
+    tuplas = []
+    rejeitadas = []
+    # Mesma decodificação do open(..., encoding='utf-8', errors='ignore') dos scripts
+    texto = io.TextIOWrapper(io.BytesIO(dados), encoding='utf-8', errors='ignore')
+    if motor == 'vetorizado':
+        linhas = texto.readlines()
+        tuplas = parse_em_lotes(layout, linhas, rejeitadas if validar else None, descartar)
+        return len(linhas), tuplas, rejeitadas
+    for line in texto:
+        linhas_lidas += 1
+        valores = parse(line)
+        if valores is not None:
+            if validar and layout.tem_campo_nulo(valores):
+                motivo = layout.validar(line, valores)
+                if motivo:
+                    rejeitadas.append((linhas_lidas, motivo, line))
+                    if descartar:
+                        continue
+            tuplas.append(valores)
+    return linhas_lidas, tuplas, rejeitadas
+
+
+def registrar_rejeitadas(rejeitos, rejeitadas, linha_inicial):
+    """Grava as rejeitadas de um bloco no arquivo de rejeitos, numerando pelas linhas dos blocos anteriores"""
+    if rejeitos.descartar:
+        metricas.atual().contar('linhas_rejeitadas', len(rejeitadas))
+    for linha, motivo, texto in rejeitadas:
+        rejeitos.rejeitar(linha_inicial + linha, motivo, texto)
+
+
+def parse_em_ordem(executor, caminho, nome_relatorio, blocos, em_andamento, rejeitos=None, motor='linha'):
+    """
+    Envia os blocos ao pool de parse, no máximo 'em_andamento' de cada vez,
+    e gera (linhas lidas, tuplas) de cada bloco na ordem do arquivo. As
+    rejeitadas vão para 'rejeitos' numeradas pela linha no arquivo.
+    """
+    pendentes = deque()
+    proximos = iter(blocos)
+
+    def enviar_proximo():
+        bloco = next(proximos, None)
+        if bloco is not None:
+            pendentes.append(executor.submit(parse_bloco, nome_relatorio, caminho, *bloco, rejeitos is not None,
+                                             motor, rejeitos is not None and rejeitos.descartar))
+
+    for _ in range(em_andamento):
+        enviar_proximo()
+
+    execucao = metricas.atual()
+    lidas_antes = 0
+    try:
+        while pendentes:
+            linhas_lidas, tuplas, rejeitadas = pendentes.popleft().result()
+            enviar_proximo()
+            if rejeitadas:
+                registrar_rejeitadas(rejeitos, rejeitadas, lidas_antes)
+            lidas_antes += linhas_lidas
+            execucao.contar('linhas_lidas', linhas_lidas)
+            execucao.contar('registros_parseados', len(tuplas))
+            yield linhas_lidas, tuplas
+        if rejeitos is not None:
+            rejeitos.verificar_orcamento(lidas_antes, final=True)
+    finally:
+        # Carga interrompida: os blocos ainda não iniciados não são processados
+        for futuro in pendentes:
+            futuro.cancel()
+
+
+def ler_relatorio_paralelo(caminho, nome_relatorio, processos, progresso,
+                           tamanho_bloco=TAMANHO_BLOCO_PADRAO, rejeitos=None, motor='linha'):
+    """
+    Equivalente paralelo do carga_lote.ler_relatorio: devolve as tuplas na
+    ordem do arquivo, mantendo no máximo 2 blocos por processo em andamento.
+    """
+    caminho = str(caminho)
+    blocos = dividir_em_blocos(caminho, processos, tamanho_bloco)
+    print(f"Parse em {len(blocos)} blocos com {processos} processos...")
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        metricas.atual().contar('bytes_lidos', os.path.getsize(caminho))
+        for linhas_lidas, tuplas in parse_em_ordem(executor, caminho, nome_relatorio, blocos, processos * 2,
+                                                   rejeitos, motor):
+            progresso['linhas'] += linhas_lidas
+            print(f"Processadas {progresso['linhas']} linhas...")
+            yield from tuplas
@@ -0,0 +1,181 @@
+"""
+PARSE VETORIZADO DE RELATÓRIOS EM LARGURA FIXA
+==============================================
+
+Motor opcional (requer numpy) com a mesma interface do parse por linha: em
+vez de recortar campo a campo em Python, as linhas aceitas de um lote são
+montadas em uma matriz de caracteres de largura fixa e cada coluna é
+recortada e aparada de uma vez só; qtde, peso_liq, peso_bruto e as datas
+passam pelos mesmos conversores memorizados (conversores.py) do parse por
+linha. O resultado é o mesmo do LayoutFixo.parse / parse_line_*, inclusive
+as linhas rejeitadas. Nos scripts de carga: --motor vetorizado.
+
+Verificação: python scripts/parse_vetorizado.py bases/estoque/fatex01.txt
+compara os dois motores no arquivo inteiro e mostra o tempo de cada um.
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import metricas
+from layout_fixo import CONVERSORES
+
+# Motores de parse aceitos pelo --motor dos scripts de carga
+MOTORES_PARSE = ('linha', 'vetorizado')
+
+# Linhas lidas por lote (limita a matriz a ~LINHAS_POR_LOTE x largura x 4 bytes)
+LINHAS_POR_LOTE = 65536
+
+
+def disponivel():
+    """Indica se o numpy está instalado"""
+    return np is not None
+
+
+def _recortar(layout, aceitas):
+    """Tuplas das linhas aceitas (já sem espaços à direita), recortando coluna a coluna"""
+    if not aceitas:
+        return []
+    if '\x00' in ''.join(aceitas):
+        # O numpy descarta NULs no fim das strings; recorte linha a linha
+        return [layout.extrair(line) for line in aceitas]
+
+    largura = max(campo.fim for campo in layout.campos if campo.inicio is not None)
+    caracteres = np.array(aceitas, dtype=f'U{largura}').view('U1').reshape(len(aceitas), largura)
+
+    colunas = []
+    for campo in layout.campos:
+        if campo.inicio is None:
+            colunas.append([campo.tipo(line) for line in aceitas])
+            continue
+        tamanho = campo.fim - campo.inicio
+        coluna = np.ascontiguousarray(caracteres[:, campo.inicio:campo.fim]).view(f'U{tamanho}').ravel()
+        coluna = np.char.strip(coluna)
+        if campo.tipo in CONVERSORES:
+            colunas.append(list(map(CONVERSORES[campo.tipo], coluna.tolist())))
+        else:
+            colunas.append(coluna.tolist())
+    return list(zip(*colunas))
+
+
+def parse_linhas(layout, linhas, rejeitadas=None, descartar=True):
+    """
+    Faz o parse de uma lista de linhas (str) e devolve a lista de tuplas,
+    na ordem das colunas do layout, como layout.parse faria linha a linha.
+    Com a lista 'rejeitadas', os registros com campo inválido entram nela
+    como (linha no lote, motivo, texto) e, com descartar=True, saem do
+    resultado, como no parse_paralelo.parse_bloco.
+    """
+    aceita = layout.aceita
+    if rejeitadas is None:
+        return _recortar(layout, [line for line in map(str.rstrip, linhas) if aceita(line)])
+
+    numeradas = [(numero, line) for numero, line in enumerate(map(str.rstrip, linhas), start=1) if aceita(line)]
+    tuplas = _recortar(layout, [line for _, line in numeradas])
+    tem_campo_nulo = layout.tem_campo_nulo
+    validas = []
+    for (numero, line), valores in zip(numeradas, tuplas):
+        if tem_campo_nulo(valores):
+            motivo = layout.validar(line, valores)
+            if motivo:
+                rejeitadas.append((numero, motivo, linhas[numero - 1]))
+                if descartar:
+                    continue
+        validas.append(valores)
+    return validas
+
+
+def parse_em_lotes(layout, linhas, rejeitadas=None, descartar=True):
+    """parse_linhas em lotes de LINHAS_POR_LOTE (limita a matriz), numerando as rejeitadas pela lista inteira"""
+    tuplas = []
+    for inicio in range(0, len(linhas), LINHAS_POR_LOTE):
+        do_lote = None if rejeitadas is None else []
+        tuplas.extend(parse_linhas(layout, linhas[inicio:inicio + LINHAS_POR_LOTE], do_lote, descartar))
+        if do_lote:
+            rejeitadas.extend((inicio + numero, motivo, texto) for numero, motivo, texto in do_lote)
+    return tuplas
+
+
+def ler_relatorio_vetorizado(caminho, layout, progresso, rejeitos=None, linhas_por_lote=LINHAS_POR_LOTE):
+    """
+    Equivalente vetorizado do carga_lote.ler_relatorio: mesmas tuplas, na
+    ordem do arquivo, mesmas rejeições e mesmas métricas
+    """
+    if np is None:
+        raise RuntimeError("O parse vetorizado requer o numpy (pip install numpy)")
+    descartar = rejeitos is not None and rejeitos.descartar
+    lidas = registros = rejeitadas_total = 0
+    try:
+        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+            while True:
+                linhas = []
+                for line in f:
+                    linhas.append(line)
+                    if len(linhas) == linhas_por_lote:
+                        break
+                if not linhas:
+                    break
+                rejeitadas = None if rejeitos is None else []
+                tuplas = parse_linhas(layout, linhas, rejeitadas, descartar)
+                if rejeitadas:
+                    if descartar:
+                        rejeitadas_total += len(rejeitadas)
+                    for numero, motivo, texto in rejeitadas:
+                        rejeitos.rejeitar(lidas + numero, motivo, texto)
+                lidas += len(linhas)
+                registros += len(tuplas)
+                progresso['linhas'] += len(linhas)
+                print(f"Processadas {progresso['linhas']} linhas...")
+                yield from tuplas
+        if rejeitos is not None:
+            rejeitos.verificar_orcamento(lidas, final=True)
+    finally:
+        execucao = metricas.atual()
+        execucao.contar('linhas_lidas', lidas)
+        execucao.contar('registros_parseados', registros)
+        execucao.contar('linhas_rejeitadas', rejeitadas_total)
+        execucao.contar('bytes_lidos', os.path.getsize(caminho))
+
+
+def verificar(caminho, layout):
+    """Compara o motor vetorizado com o parse por linha no arquivo; devolve o número de divergências"""
+    with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+        linhas = f.readlines()
+
+    inicio = time.perf_counter()
+    esperadas = [valores for valores in map(layout.parse, linhas) if valores is not None]
+    tempo_linha = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtidas = parse_em_lotes(layout, linhas)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    divergencias = sum(1 for a, b in zip(esperadas, obtidas) if a != b) + abs(len(esperadas) - len(obtidas))
+    for a, b in zip(esperadas, obtidas):
+        if a != b:
+            print(f"  Divergência:\n    por linha:   {a}\n    vetorizado:  {b}")
+            break
+    print(f"{Path(caminho).name}: {len(linhas)} linhas, {len(esperadas)} registros, {divergencias} divergências")
+    print(f"  por linha: {tempo_linha:.2f}s | vetorizado: {tempo_vetorizado:.2f}s")
+    return divergencias
+
+
+if __name__ == "__main__":
+    from relatorios_estoque import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Compara o parse vetorizado com o parse por linha")
+    parser.add_argument('arquivos', nargs='+', type=Path, help="Relatórios TXT (o layout vem do nome do arquivo)")
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("O parse vetorizado requer o numpy (pip install numpy)")
+    total = 0
+    for arquivo in args.arquivos:
+        total += verificar(arquivo, LAYOUTS[arquivo.stem.lower()])
+    raise SystemExit(1 if total else 0)
@@ -0,0 +1,160 @@
+"""
+PIPELINE DE CARGA
+=================
+
+Na carga em lote a leitura e o parse param enquanto o executemany espera o
+MySQL, e o MySQL fica ocioso enquanto o Python faz o parse do lote
+seguinte. No modo 'pipeline' as etapas são ligadas por uma fila limitada:
+
+- uma thread produtora lê, faz o parse, converte (hash_linha incluído) e
+  monta os lotes;
+- um ou mais gravadores gravam os lotes: a thread que chamou, com a conexão
+  recebida, e --gravadores - 1 threads extras, cada uma com uma conexão do
+  pool.
+
+A espera pelo banco (rede, commit) libera o GIL, então fica escondida atrás
+do parse do lote seguinte. A fila guarda no máximo LOTES_EM_FILA lotes:
+quando os gravadores ficam para trás a produtora espera (backpressure) e a
+memória fica limitada a LOTES_EM_FILA + gravadores + 1 lotes, seja qual for
+o tamanho do arquivo.
+
+Com um gravador os lotes são gravados na ordem do arquivo, como no modo
+'lote'. Com mais de um os ids deixam de seguir a ordem do arquivo entre
+lotes; a carga delta continua correta, mas pode reescrever registros com a
+chave repetida na carga seguinte.
+"""
+
+import queue
+import threading
+import time
+from itertools import islice
+
+import metricas
+from carga_lote import TAMANHO_LOTE_PADRAO, CarregadorLote
+from db import conectar_banco
+
+# Lotes prontos esperando gravação; a produtora para quando a fila enche
+LOTES_EM_FILA = 4
+
+# Intervalo em que produtora e gravadores bloqueados verificam se a carga foi interrompida
+INTERVALO_VERIFICACAO = 0.1
+
+_FIM = object()
+
+
+def _colocar(fila, item, parar, execucao):
+    """Põe o item na fila esperando vaga; devolve False se a carga foi interrompida"""
+    inicio = time.perf_counter()
+    try:
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=INTERVALO_VERIFICACAO)
+                return True
+            except queue.Full:
+                continue
+        return False
+    finally:
+        execucao.somar_etapa('espera_fila_cheia', time.perf_counter() - inicio)
+
+
+def _retirar(fila, parar, execucao):
+    """Retira o próximo lote; devolve _FIM no fim da carga ou se ela foi interrompida"""
+    inicio = time.perf_counter()
+    try:
+        while not parar.is_set():
+            try:
+                return fila.get(timeout=INTERVALO_VERIFICACAO)
+            except queue.Empty:
+                continue
+        return _FIM
+    finally:
+        execucao.somar_etapa('espera_fila_vazia', time.perf_counter() - inicio)
+
+
+def _produzir(linhas, tamanho_lote, gravadores, fila, parar, erros):
+    """Thread produtora: consome as linhas (leitura + parse + conversão) e enfileira os lotes"""
+    execucao = metricas.atual()
+    iterador = iter(linhas)
+    try:
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            lote = list(islice(iterador, tamanho_lote))
+            execucao.somar_etapa('leitura_parse', time.perf_counter() - inicio)
+            if not lote or not _colocar(fila, lote, parar, execucao):
+                break
+    except BaseException as erro:
+        # Ex.: orçamento de erros excedido no parse; os gravadores param sem gravar o resto
+        erros.append(erro)
+        parar.set()
+    finally:
+        if parar.is_set() and hasattr(iterador, 'close'):
+            # Fecha o gerador de leitura (arquivo, processos de parse) sem ler o resto
+            iterador.close()
+        for _ in range(gravadores):
+            _colocar(fila, _FIM, parar, execucao)
+
+
+def _gravar(carregador, fila, parar, erros):
+    """Gravador: grava os lotes da fila com a conexão do carregador até o fim da carga"""
+    execucao = metricas.atual()
+    try:
+        while True:
+            lote = _retirar(fila, parar, execucao)
+            if lote is _FIM:
+                return
+            carregador.gravar(lote)
+    except BaseException as erro:
+        erros.append(erro)
+        parar.set()
+
+
+def carregar_em_pipeline(conn, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE_PADRAO, rejeitos=None,
+                         gravadores=1):
+    """
+    Carrega as linhas com o parse em uma thread produtora e a gravação em
+    'gravadores' conexões (a recebida mais as extras do pool). Um erro em
+    qualquer etapa interrompe as demais e é levantado aqui.
+    """
+    inicio = time.perf_counter()
+    conexoes = [conn]
+    for _ in range(max(1, gravadores) - 1):
+        extra = conectar_banco(perfil='carga')
+        if extra is None:
+            print(f"Aviso: pipeline com {len(conexoes)} gravador(es) em vez de {gravadores}")
+            break
+        conexoes.append(extra)
+    carregadores = [CarregadorLote(c, tabela, colunas, tamanho_lote, rejeitos) for c in conexoes]
+
+    fila = queue.Queue(maxsize=LOTES_EM_FILA)
+    parar = threading.Event()
+    erros = []
+    produtora = threading.Thread(target=_produzir, name=f'parse_{tabela}',
+                                 args=(linhas, tamanho_lote, len(carregadores), fila, parar, erros))
+    extras = [
+        threading.Thread(target=_gravar, name=f'gravador_{tabela}_{indice}', args=(carregador, fila, parar, erros))
+        for indice, carregador in enumerate(carregadores[1:], start=1)
+    ]
+    produtora.start()
+    for thread in extras:
+        thread.start()
+    try:
+        _gravar(carregadores[0], fila, parar, erros)
+    finally:
+        for thread in extras:
+            thread.join()
+        produtora.join()
+        for extra in conexoes[1:]:
+            extra.close()
+    if erros:
+        raise erros[0]
+
+    duracao = time.perf_counter() - inicio
+    inseridos = sum(carregador.inseridos for carregador in carregadores)
+    return {
+        'modo': 'pipeline' if len(carregadores) == 1 else f'pipeline ({len(carregadores)} gravadores)',
+        'inseridos': inseridos,
+        'lotes': sum(carregador.lotes for carregador in carregadores),
+        'erros': sum(carregador.erros for carregador in carregadores),
+        'duracao': duracao,
+        'linhas_por_segundo': inseridos / duracao if duracao > 0 else 0.0,
+    }
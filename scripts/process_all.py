@@ -0,0 +1,198 @@
+"""
+CARGA COMPLETA DA PASTA DE ESTOQUE
+==================================
+
+Descobre todos os relatórios conhecidos em bases/estoque/, faz o parse dos
+arquivos em paralelo em um pool de processos (o parse é só CPU) e entrega
+as linhas para um conjunto limitado de conexões gravadoras. Arquivos grandes
+são divididos em blocos (parse_paralelo), então a atualização completa usa
+todos os núcleos mesmo quando um único arquivo domina o volume. Os blocos de
+cada arquivo seguem, na ordem, direto para a gravação: só alguns blocos por
+arquivo ficam na memória, nunca o arquivo inteiro.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from carga_delta import carregar_delta, preparar_tabela_delta
+from carga_lote import MODOS_CARGA, TAMANHO_LOTE_PADRAO
+from carga_relatorio import PASTA_ESTOQUE
+from db import conectar_banco, preparar_pool
+from metricas import atual, executar
+from parse_paralelo import TAMANHO_BLOCO_PADRAO, dividir_em_blocos, parse_em_ordem
+from parse_vetorizado import MOTORES_PARSE, disponivel
+from rejeitos import Rejeitos, orcamento_erros
+from relatorios_estoque import RELATORIOS, colunas_carga, com_hash
+from troca_tabela import carregar_com_troca
+
+
+def descobrir_relatorios(pasta):
+    """Lista (relatorio, arquivo) para cada TXT da pasta com layout conhecido, maiores primeiro"""
+    encontrados = []
+    for arquivo in pasta.glob('*.txt'):
+        relatorio = RELATORIOS.get(arquivo.stem.lower())
+        if relatorio:
+            encontrados.append((relatorio, arquivo))
+        else:
+            print(f"Ignorando {arquivo.name}: layout desconhecido")
+    encontrados.sort(key=lambda item: item[1].stat().st_size, reverse=True)
+    return encontrados
+
+
+def ler_arquivo(parsers, relatorio, arquivo, tamanho_bloco, em_andamento, resultado, rejeitos, motor='linha'):
+    """Tuplas do arquivo na ordem, com no máximo 'em_andamento' blocos dele no pool de parse"""
+    blocos = dividir_em_blocos(arquivo, 1, tamanho_bloco)
+    for linhas_lidas, tuplas in parse_em_ordem(parsers, str(arquivo), relatorio.nome, blocos, em_andamento,
+                                               rejeitos, motor):
+        resultado['linhas'] += linhas_lidas
+        yield from tuplas
+
+
+def gravar_relatorio(relatorio, linhas, modo, tamanho_lote, delta=False, rejeitos=None):
+    """
+    Executado nas threads gravadoras: carrega via staging + troca (ou aplica
+    o delta) consumindo as linhas à medida que o parse as entrega. Qualquer
+    falha é levantada com a causa.
+    """
+    conn = conectar_banco(allow_local_infile=(modo == 'infile'), perfil='carga')
+    if not conn:
+        raise RuntimeError(f"sem conexão com o banco para gravar {relatorio.tabela}")
+    try:
+        if delta:
+            preparar_tabela_delta(conn, relatorio)
+            return carregar_delta(conn, relatorio, linhas, tamanho_lote)
+
+        return carregar_com_troca(conn, relatorio, com_hash(linhas), colunas_carga(relatorio),
+                                  modo, tamanho_lote, rejeitos)
+    finally:
+        conn.close()
+
+
+def carregar_arquivo(parsers, relatorio, arquivo, modo, tamanho_lote, tamanho_bloco, em_andamento, delta,
+                     resultado, motor='linha'):
+    """Parse em blocos e gravação de um arquivo, com o arquivo de rejeitos próprio"""
+    rejeitos = resultado['rejeitos']
+    try:
+        linhas = ler_arquivo(parsers, relatorio, arquivo, tamanho_bloco, em_andamento, resultado, rejeitos, motor)
+        return gravar_relatorio(relatorio, linhas, modo, tamanho_lote, delta, rejeitos)
+    finally:
+        rejeitos.fechar()
+
+
+def processar_todos(pasta=PASTA_ESTOQUE, processos=None, conexoes=2, modo='pipeline',
+                    tamanho_lote=TAMANHO_LOTE_PADRAO, tamanho_bloco=TAMANHO_BLOCO_PADRAO, delta=False,
+                    max_rejeitos=(None, None), motor='linha', descartar_invalidas=False):
+    """Carrega todos os relatórios da pasta de estoque"""
+    if not pasta.exists():
+        print(f"Pasta {pasta} não encontrada!")
+        atual().falhar(f"pasta {pasta} não encontrada")
+        return
+
+    relatorios = descobrir_relatorios(pasta)
+    if not relatorios:
+        print(f"Nenhum relatório conhecido em {pasta}")
+        atual().falhar(f"nenhum relatório conhecido em {pasta}")
+        return
+
+    processos = processos or os.cpu_count() or 1
+    print(f"Carregando {len(relatorios)} relatórios com {processos} processos de parse "
+          f"e {conexoes} conexões gravadoras (modo: {'delta' if delta else modo})...")
+
+    # Uma conexão por thread gravadora, reaproveitada de um arquivo para o outro
+    if not preparar_pool(conexoes, allow_local_infile=(modo == 'infile')):
+        atual().falhar("sem conexão com o banco")
+        return
+
+    # Blocos em andamento por arquivo: os arquivos gravados ao mesmo tempo mantêm
+    # cerca de 2 blocos por processo no pool, como no ler_relatorio_paralelo
+    em_andamento = max(2, -(-2 * processos // conexoes))
+
+    inicio = time.perf_counter()
+    resultados = {}
+
+    with ProcessPoolExecutor(max_workers=processos) as parsers, \
+            ThreadPoolExecutor(max_workers=conexoes) as gravadores:
+        # Cada gravador faz o parse do seu arquivo bloco a bloco, maiores arquivos primeiro
+        futuros = {}
+        for relatorio, arquivo in relatorios:
+            atual().contar('bytes_lidos', arquivo.stat().st_size)
+            atual().registrar_entrada(arquivo)
+            resultado = resultados[relatorio.nome] = {'linhas': 0,
+                                                      'rejeitos': Rejeitos(relatorio.nome, max_rejeitos,
+                                                                           descartar=descartar_invalidas)}
+            futuro = gravadores.submit(carregar_arquivo, parsers, relatorio, arquivo, modo, tamanho_lote,
+                                       tamanho_bloco, em_andamento, delta, resultado, motor)
+            futuros[futuro] = relatorio
+
+        for futuro in as_completed(futuros):
+            relatorio = futuros[futuro]
+            try:
+                estatisticas = futuro.result()
+            except Exception as e:
+                # Os outros arquivos seguem, mas a execução termina como falha
+                print(f"  ❌ Carga de {relatorio.tabela} interrompida: {e}")
+                atual().falhar(f"{relatorio.tabela}: {e}")
+                continue
+            resultados[relatorio.nome].update(estatisticas)
+            if delta:
+                print(f"  ✅ {relatorio.tabela}: {estatisticas['inseridos']} incluídos, "
+                      f"{estatisticas['atualizados']} alterados, {estatisticas['removidos']} removidos "
+                      f"em {estatisticas['duracao']:.2f}s")
+            else:
+                print(f"  ✅ {relatorio.tabela}: {estatisticas['inseridos']} registros em "
+                      f"{estatisticas['duracao']:.2f}s ({estatisticas['linhas_por_segundo']:.0f} linhas/s)")
+
+    duracao = time.perf_counter() - inicio
+    total = sum(resultado.get('inseridos', 0) for resultado in resultados.values())
+    print("\n📊 RESUMO DA CARGA:")
+    for nome, resultado in resultados.items():
+        rejeitos = resultado.pop('rejeitos')
+        print(f"   • {nome}: {resultado['linhas']} linhas lidas, {resultado.get('inseridos', 0)} inseridas"
+              f"{f', {rejeitos.total} rejeitadas ({rejeitos.caminho})' if rejeitos.total else ''}")
+    print(f"   • Total inserido: {total} registros em {duracao:.2f}s "
+          f"({total / duracao if duracao > 0 else 0:.0f} linhas/s)")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega todos os relatórios de bases/estoque em paralelo")
+    parser.add_argument('--pasta', type=Path, default=PASTA_ESTOQUE,
+                        help="Pasta com os relatórios TXT (padrão: %(default)s)")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Processos de parse (padrão: número de núcleos)")
+    parser.add_argument('--conexoes', type=int, default=2,
+                        help="Conexões gravadoras simultâneas (padrão: %(default)s)")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_PADRAO,
+                        help="Linhas por lote de INSERT (padrão: %(default)s)")
+    parser.add_argument('--modo', choices=MODOS_CARGA, default='pipeline',
+                        help="'lote' usa INSERT em lote; 'pipeline' calcula o hash em paralelo com os INSERT em "
+                             "lote; 'infile' usa LOAD DATA LOCAL INFILE (padrão: %(default)s)")
+    parser.add_argument('--bloco-mb', type=int, default=TAMANHO_BLOCO_PADRAO // (1024 * 1024),
+                        help="Tamanho dos blocos de parse em MB (padrão: %(default)s)")
+    parser.add_argument('--motor', choices=MOTORES_PARSE, default='linha',
+                        help="Motor de parse: 'linha' (LayoutFixo) ou 'vetorizado' (numpy, parse_vetorizado.py) "
+                             "(padrão: %(default)s)")
+    parser.add_argument('--delta', action='store_true',
+                        help="Mantém as tabelas e aplica só os registros incluídos, alterados e removidos")
+    parser.add_argument('--max-rejeitos', type=orcamento_erros, default=(None, None),
+                        help="Orçamento de erros por arquivo: a carga do arquivo é interrompida (sem alterar "
+                             "a tabela) quando as linhas rejeitadas passam de N ou de P%% das linhas lidas")
+    parser.add_argument('--descartar-invalidas', action='store_true',
+                        help="Deixa fora da tabela os registros com campo numérico ou de data inválido (por "
+                             "padrão são carregados com NULL no campo e só registrados no arquivo de rejeitos)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Grava relatórios do cProfile e do tracemalloc da execução em perfis/")
+    args = parser.parse_args()
+    if args.motor == 'vetorizado' and not disponivel():
+        parser.error("o motor vetorizado requer o numpy (pip install numpy)")
+    with executar('process_all', perfil=args.profile) as execucao:
+        processar_todos(args.pasta, args.processos, args.conexoes, args.modo, args.lote,
+                        args.bloco_mb * 1024 * 1024, args.delta, args.max_rejeitos, args.motor,
+                        args.descartar_invalidas)
+    # Algum arquivo não foi carregado: o código de saída avisa o agendador
+    if execucao.status != 'ok':
+        sys.exit(1)
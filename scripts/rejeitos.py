@@ -0,0 +1,139 @@
+"""
+LINHAS REJEITADAS DAS CARGAS
+============================
+
+Registro das linhas com problema nas cargas: registros com campo numérico
+ou de data que não converte (o parse devolve NULL no campo) e linhas
+recusadas pelo banco no INSERT. Em vez de um print por linha, cada rejeição
+vira uma linha em rejeitos/<relatorio>_<timestamp>.tsv (número da linha,
+motivo e texto original), gravado com buffer, e é somada no contador do
+motivo.
+
+Por padrão os registros com campo inválido continuam sendo carregados com
+NULL no campo e só ficam registrados no arquivo; com descartar=True
+(--descartar-invalidas) eles ficam fora da tabela. As recusas do INSERT
+nunca entram na tabela.
+
+O orçamento de erros (--max-rejeitos) interrompe a carga assim que é
+ultrapassado: um número absoluto ('500') ou uma fração das linhas lidas
+('0.5%'). A exceção sai antes da troca da tabela (ou da transação do
+delta), então a tabela em uso não é alterada.
+"""
+
+import argparse
+import csv
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import metricas
+
+PASTA_REJEITOS = Path('rejeitos')
+
+# Buffer do arquivo de rejeitos: um relatório malformado não vira uma escrita por linha
+TAMANHO_BUFFER = 1024 * 1024
+
+# Orçamento em percentual só é avaliado depois de tantas linhas (antes disso a fração oscila demais)
+MINIMO_LINHAS_PERCENTUAL = 10000
+
+
+class OrcamentoErrosExcedido(Exception):
+    """Mais linhas rejeitadas do que o orçamento de erros da carga permite"""
+
+
+def orcamento_erros(texto):
+    """Interpreta '--max-rejeitos': '500' -> (500, None); '0.5%' -> (None, 0.005)"""
+    try:
+        if texto.endswith('%'):
+            fracao = float(texto[:-1]) / 100
+            if fracao < 0:
+                raise ValueError
+            return None, fracao
+        limite = int(texto)
+        if limite < 0:
+            raise ValueError
+        return limite, None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"orçamento inválido: {texto!r} (use um número de linhas ou um percentual, "
+                                         f"ex.: 500 ou 0.5%)") from None
+
+
+class Rejeitos:
+    """Arquivo de rejeitos de uma carga, com contagem por motivo e orçamento de erros"""
+
+    def __init__(self, nome, orcamento=(None, None), pasta=PASTA_REJEITOS, descartar=False):
+        self.nome = nome
+        self.descartar = descartar
+        self.limite, self.fracao = orcamento
+        self.pasta = Path(pasta)
+        self.caminho = None
+        self.motivos = Counter()
+        self.total = 0
+        self._arquivo = None
+        self._escritor = None
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        # O arquivo só é criado na primeira rejeição (e reaberto para acrescentar depois de fechar())
+        if self.caminho is not None:
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8', newline='', buffering=TAMANHO_BUFFER)
+            self._escritor = csv.writer(self._arquivo, delimiter='\t', lineterminator='\n')
+            return
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho = self.pasta / f"{self.nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tsv"
+        self._arquivo = open(self.caminho, 'w', encoding='utf-8', newline='', buffering=TAMANHO_BUFFER)
+        self._escritor = csv.writer(self._arquivo, delimiter='\t', lineterminator='\n')
+        self._escritor.writerow(('linha', 'motivo', 'texto'))
+
+    def rejeitar(self, numero_linha, motivo, texto):
+        """
+        Registra uma rejeição (numero_linha None quando a linha de origem não
+        é conhecida, como nas recusas do INSERT) e aplica o orçamento
+        """
+        with self._lock:
+            if self._arquivo is None:
+                self._abrir()
+            self._escritor.writerow(('' if numero_linha is None else numero_linha, motivo, texto.rstrip('\r\n')))
+            self.motivos[motivo] += 1
+            self.total += 1
+        metricas.atual().contar(f'rejeitadas.{motivo}')
+        self.verificar_orcamento(numero_linha)
+
+    def verificar_orcamento(self, linhas_lidas=None, final=False):
+        """Levanta OrcamentoErrosExcedido se as rejeições passaram do orçamento"""
+        if self.limite is not None and self.total > self.limite:
+            raise OrcamentoErrosExcedido(
+                f"{self.nome}: {self.total} linhas rejeitadas, orçamento de {self.limite} ({self._detalhe()})")
+        if (self.fracao is not None and linhas_lidas
+                and (final or linhas_lidas >= MINIMO_LINHAS_PERCENTUAL)
+                and self.total > self.fracao * linhas_lidas):
+            raise OrcamentoErrosExcedido(
+                f"{self.nome}: {self.total} de {linhas_lidas} linhas rejeitadas, orçamento de "
+                f"{self.fracao:.2%} ({self._detalhe()})")
+
+    def _detalhe(self):
+        self.fechar()
+        return f"ver {self.caminho}" if self.caminho else "nenhum arquivo gravado"
+
+    def fechar(self):
+        """Grava o que restou no buffer e fecha o arquivo"""
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+
+    def imprimir_resumo(self):
+        """Uma linha por motivo, no lugar dos prints por linha"""
+        if not self.total:
+            return
+        destino = "fora da tabela" if self.descartar else "campos inválidos carregados com NULL"
+        print(f"Linhas rejeitadas: {self.total} ({destino}; gravadas em {self.caminho})")
+        for motivo, quantidade in self.motivos.most_common():
+            print(f"   • {motivo}: {quantidade}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
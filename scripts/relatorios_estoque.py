@@ -0,0 +1,196 @@
+"""
+RELATÓRIOS DE ESTOQUE
+=====================
+
+Especificação declarativa de cada relatório TXT de estoque: layout dos
+campos e estrutura da tabela de destino. Incluir um novo relatório é só
+declarar seus campos e sua tabela aqui.
+"""
+
+import hashlib
+from collections import namedtuple
+
+from conversores import converter_decimal
+from layout_fixo import Campo, LayoutFixo
+
+# chave: colunas que identificam um registro entre duas cargas (usada na carga delta)
+# indices: índices secundários (nome, colunas), criados só depois da carga em massa
+Relatorio = namedtuple('Relatorio', ['nome', 'tabela', 'layout', 'definicoes', 'chave', 'indices'])
+
+# Exemplo: 1.01.A.001 0700278 STEIN - 3110           1 000    5          42,00 MARROM CLA                 7530240001200 MT       8,400        8,900
+CAMPOS_ESTOQUE = (
+    Campo('localizacao', 0, 10, 'texto'),
+    Campo('codigo', 11, 19, 'texto'),
+    Campo('apelido', 20, 44, 'texto'),
+    Campo('familia', 45, 47, 'texto'),
+    Campo('qual', 48, 51, 'texto'),
+    Campo('qmm', 52, 55, 'texto'),
+    Campo('cor', 56, 59, 'texto'),
+    Campo('qtde', 60, 69, 'decimal'),
+    Campo('desc_cor', 70, 94, 'texto'),
+    Campo('tam', 95, 98, 'texto'),
+    Campo('tamd', 99, 103, 'texto'),
+    Campo('embalagem_vol', 104, 119, 'texto'),
+    Campo('un', 120, 122, 'texto'),
+    Campo('peso_liq', 123, 132, 'decimal'),
+    Campo('peso_bruto', 133, 142, 'decimal'),
+)
+
+
+def _linha_localizacao(line):
+    """Linha de dados começa por uma localização (padrão: 1.01.A.001)"""
+    return len(line) > 10 and line[1] == '.' and not line.startswith(' ')
+
+
+def _layout_estoque(nome, prefixo_empresa):
+    return LayoutFixo(
+        nome,
+        CAMPOS_ESTOQUE,
+        _linha_localizacao,
+        prefixos_ignorados=(prefixo_empresa, 'MAPEAMENTO', 'PERIODO', 'LOCALIZAC', '---'),
+        trechos_ignorados=('TOTAL',),
+    )
+
+
+def _metros_tecido01(line):
+    """Metros: valor numérico após a qualidade 'A' (posição variável)"""
+    inicio = line.find('A', 50) + 2
+    if inicio <= 1:
+        return None
+    fim = line.find(',', inicio)
+    if fim == -1:
+        fim = inicio + 10
+    return converter_decimal(line[inicio:fim + 3].strip())
+
+
+# TEC ACAB           2.855-72/0 080.6481-01 14/04/24          1 A               62,00       11/08/25      676           37,200      MT 1.08.A.001  559005
+CAMPOS_TECIDO01 = (
+    Campo('tipo', 0, 10, 'texto'),
+    Campo('produto', 11, 25, 'texto'),
+    Campo('codigo_produto', 26, 40, 'texto'),
+    Campo('entrada', 41, 50, 'data'),
+    Campo('qualidade', 51, 55, 'texto'),
+    Campo('metros', None, None, _metros_tecido01),
+    Campo('lancamento', 71, 80, 'data'),
+    Campo('oper', 81, 90, 'texto'),
+    Campo('peso', 91, 100, 'decimal'),
+    Campo('un', 101, 105, 'texto'),
+    Campo('localizacao', 106, 115, 'texto'),
+    Campo('nota', 116, 125, 'texto'),
+)
+
+TIPOS_TECIDO01 = ('TEC ACAB', 'TEC CRU', 'MALHA', 'FIAPO')
+
+LAYOUT_CONFEC01 = _layout_estoque('confec01', 'CORTTEX')
+LAYOUT_FATEX01 = _layout_estoque('fatex01', 'FATEX')
+LAYOUT_ESTSC01 = _layout_estoque('estsc01', 'CORTTEX')
+LAYOUT_TECIDO01 = LayoutFixo(
+    'tecido01',
+    CAMPOS_TECIDO01,
+    lambda line: line.startswith(TIPOS_TECIDO01),
+    trechos_ignorados=('TOTAL QUAL',),
+)
+
+LAYOUTS = {
+    layout.nome: layout
+    for layout in (LAYOUT_CONFEC01, LAYOUT_FATEX01, LAYOUT_ESTSC01, LAYOUT_TECIDO01)
+}
+
+# Estrutura idêntica para confec01, fatex01 e estsc01
+DEFINICOES_ESTOQUE = """
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    localizacao VARCHAR(20),
+    codigo VARCHAR(20),
+    apelido VARCHAR(50),
+    familia VARCHAR(10),
+    qual VARCHAR(10),
+    qmm VARCHAR(10),
+    cor VARCHAR(10),
+    qtde DECIMAL(10,2),
+    desc_cor VARCHAR(50),
+    tam VARCHAR(10),
+    tamd VARCHAR(10),
+    embalagem_vol VARCHAR(50),
+    un VARCHAR(10),
+    peso_liq DECIMAL(10,3),
+    peso_bruto DECIMAL(10,3),
+    hash_linha CHAR(32),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+DEFINICOES_TECIDO01 = """
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(20),
+    produto VARCHAR(50),
+    codigo_produto VARCHAR(50),
+    entrada DATE,
+    qualidade VARCHAR(10),
+    metros DECIMAL(10,2),
+    lancamento DATE,
+    oper VARCHAR(20),
+    peso DECIMAL(10,3),
+    un VARCHAR(10),
+    localizacao VARCHAR(20),
+    nota VARCHAR(20),
+    hash_linha CHAR(32),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+CHAVE_ESTOQUE = ('localizacao', 'codigo', 'cor', 'tam')
+CHAVE_TECIDO01 = ('localizacao', 'codigo_produto', 'nota')
+
+INDICES_ESTOQUE = (
+    ('idx_codigo', ('codigo',)),
+    ('idx_localizacao', ('localizacao',)),
+    ('idx_familia_cor', ('familia', 'cor')),
+)
+INDICES_TECIDO01 = (
+    ('idx_codigo_produto', ('codigo_produto',)),
+    ('idx_entrada', ('entrada',)),
+    ('idx_localizacao', ('localizacao',)),
+)
+
+RELATORIO_CONFEC01 = Relatorio('confec01', 'estoque_confec01', LAYOUT_CONFEC01, DEFINICOES_ESTOQUE,
+                               CHAVE_ESTOQUE, INDICES_ESTOQUE)
+RELATORIO_FATEX01 = Relatorio('fatex01', 'estoque_fatex01', LAYOUT_FATEX01, DEFINICOES_ESTOQUE,
+                              CHAVE_ESTOQUE, INDICES_ESTOQUE)
+RELATORIO_ESTSC01 = Relatorio('estsc01', 'estoque_estsc01', LAYOUT_ESTSC01, DEFINICOES_ESTOQUE,
+                              CHAVE_ESTOQUE, INDICES_ESTOQUE)
+RELATORIO_TECIDO01 = Relatorio('tecido01', 'estoque_tecido01', LAYOUT_TECIDO01, DEFINICOES_TECIDO01,
+                               CHAVE_TECIDO01, INDICES_TECIDO01)
+
+RELATORIOS = {
+    relatorio.nome: relatorio
+    for relatorio in (RELATORIO_CONFEC01, RELATORIO_FATEX01, RELATORIO_ESTSC01, RELATORIO_TECIDO01)
+}
+
+
+def sql_criar_tabela(relatorio, tabela=None):
+    """Monta o CREATE TABLE do relatório (opcionalmente com outro nome de tabela)"""
+    return f"CREATE TABLE {tabela or relatorio.tabela} ({relatorio.definicoes})"
+
+
+def sql_criar_indices(relatorio, tabela=None, indices=None):
+    """Monta um único ALTER TABLE com todos os índices secundários do relatório"""
+    indices = relatorio.indices if indices is None else indices
+    if not indices:
+        return None
+    adicoes = ', '.join(f"ADD INDEX {nome} ({', '.join(colunas)})" for nome, colunas in indices)
+    return f"ALTER TABLE {tabela or relatorio.tabela} {adicoes}"
+
+
+def colunas_carga(relatorio):
+    """Colunas gravadas pelas cargas: as do layout mais o hash_linha"""
+    return relatorio.layout.colunas + ('hash_linha',)
+
+
+def hash_linha(valores):
+    """Hash (32 caracteres hex) dos valores parseados de um registro"""
+    texto = '\x1f'.join('' if valor is None else str(valor) for valor in valores)
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def com_hash(linhas):
+    """Acrescenta o hash_linha ao final de cada tupla parseada"""
+    for valores in linhas:
+        yield valores + (hash_linha(valores),)
@@ -0,0 +1,349 @@
+"""
+SNAPSHOT COLUNAR DAS TABELAS
+============================
+
+Grava uma tabela em formato colunar tipado, ao lado do dump SQL: Parquet
+quando o pyarrow está instalado (.parquet) e, sem ele, um formato binário
+próprio em blocos de colunas (.col). Os dois guardam a estrutura da tabela
+(CREATE TABLE), então o snapshot pode ser recarregado no MySQL ou lido
+direto por quem analisa os dados (pandas.read_parquet ou ler_colunas).
+
+Formato .col: cabeçalho MAGICO + tamanho (uint32) + JSON com tabela,
+estrutura, colunas e tipos; depois, para cada bloco de até LINHAS_POR_BLOCO
+linhas, o número de linhas (uint32) e, para cada coluna, um segmento
+comprimido com zlib (tamanho uint32 + dados) com a máscara de nulos e os
+valores da coluna.
+
+Uso: python scripts/snapshot_colunar.py ARQUIVO [ARQUIVO ...] carrega os
+snapshots no banco, recriando cada tabela antes do primeiro arquivo dela.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import struct
+import zlib
+from array import array
+from decimal import Decimal
+
+from carga_lote import TAMANHO_LOTE_PADRAO, carregar_em_lote
+from db import conectar_banco
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MAGICO = b'GDCOL1\n'
+LINHAS_POR_BLOCO = 65536
+EXTENSAO_PARQUET = '.parquet'
+EXTENSAO_BINARIA = '.col'
+
+# Tipo do MySQL (information_schema.columns.data_type) -> tipo colunar
+TIPOS_MYSQL = {
+    'tinyint': 'inteiro', 'smallint': 'inteiro', 'mediumint': 'inteiro', 'int': 'inteiro',
+    'bigint': 'inteiro', 'year': 'inteiro', 'bit': 'inteiro',
+    'float': 'real', 'double': 'real',
+    'decimal': 'decimal',
+    'date': 'data',
+    'datetime': 'datahora', 'timestamp': 'datahora',
+    'binary': 'binario', 'varbinary': 'binario', 'tinyblob': 'binario', 'blob': 'binario',
+    'mediumblob': 'binario', 'longblob': 'binario',
+}
+
+
+def tipo_colunar(data_type, column_type=''):
+    """Tipo colunar de uma coluna MySQL (texto para tudo que não é numérico, data ou binário)"""
+    tipo = TIPOS_MYSQL.get(data_type.lower(), 'texto')
+    if data_type.lower() == 'bigint' and 'unsigned' in column_type.lower():
+        # Não cabe em int64: guardado como decimal exato
+        return 'decimal'
+    return tipo
+
+
+def extensao_snapshot():
+    """Extensão do snapshot gravado neste ambiente"""
+    return EXTENSAO_PARQUET if pyarrow is not None else EXTENSAO_BINARIA
+
+
+def _texto(valor):
+    return valor.decode('utf-8', errors='replace') if isinstance(valor, (bytes, bytearray)) else str(valor)
+
+
+# Valores de uma coluna -> bytes (sem a máscara de nulos), por tipo colunar
+def _codificar_numeros(codigo):
+    def codificar(valores):
+        return array(codigo, (0 if valor is None else valor for valor in valores)).tobytes()
+    return codificar
+
+
+def _codificar_blobs(converter):
+    def codificar(valores):
+        blobs = [b'' if valor is None else converter(valor) for valor in valores]
+        tamanhos = array('I', (len(blob) for blob in blobs))
+        return tamanhos.tobytes() + b''.join(blobs)
+    return codificar
+
+
+# Bytes de uma coluna + máscara de nulos -> valores (None onde a máscara marca nulo)
+def _decodificar_numeros(codigo):
+    def decodificar(dados, nulos):
+        valores = array(codigo)
+        valores.frombytes(dados)
+        return [None if nulo else valor for nulo, valor in zip(nulos, valores.tolist())]
+    return decodificar
+
+
+def _decodificar_blobs(converter):
+    def decodificar(dados, nulos):
+        tamanhos = array('I')
+        tamanhos.frombytes(dados[:4 * len(nulos)])
+        valores = []
+        posicao = 4 * len(nulos)
+        for nulo, tamanho in zip(nulos, tamanhos):
+            valores.append(None if nulo else converter(dados[posicao:posicao + tamanho]))
+            posicao += tamanho
+        return valores
+    return decodificar
+
+
+_CODIFICADORES = {
+    'inteiro': _codificar_numeros('q'),
+    'real': _codificar_numeros('d'),
+    'decimal': _codificar_blobs(lambda valor: str(valor).encode('ascii')),
+    'data': _codificar_blobs(lambda valor: valor.isoformat().encode('ascii') if hasattr(valor, 'isoformat')
+                             else _texto(valor).encode('ascii')),
+    'datahora': _codificar_blobs(lambda valor: valor.isoformat(' ').encode('ascii') if hasattr(valor, 'isoformat')
+                                 else _texto(valor).encode('ascii')),
+    'texto': _codificar_blobs(lambda valor: _texto(valor).encode('utf-8')),
+    'binario': _codificar_blobs(lambda valor: bytes(valor) if isinstance(valor, (bytes, bytearray))
+                                else str(valor).encode('utf-8')),
+}
+_DECODIFICADORES = {
+    'inteiro': _decodificar_numeros('q'),
+    'real': _decodificar_numeros('d'),
+    'decimal': _decodificar_blobs(lambda dados: Decimal(dados.decode('ascii'))),
+    'data': _decodificar_blobs(lambda dados: datetime.date.fromisoformat(dados.decode('ascii'))),
+    'datahora': _decodificar_blobs(lambda dados: datetime.datetime.fromisoformat(dados.decode('ascii'))),
+    'texto': _decodificar_blobs(lambda dados: dados.decode('utf-8')),
+    'binario': _decodificar_blobs(bytes),
+}
+
+
+class _GravadorBinario:
+    """Grava o formato .col, um bloco de colunas a cada LINHAS_POR_BLOCO linhas"""
+
+    def __init__(self, caminho, metadados):
+        self.arquivo = open(caminho, 'wb')
+        self.tipos = metadados['tipos']
+        cabecalho = json.dumps(metadados, ensure_ascii=False).encode('utf-8')
+        self.arquivo.write(MAGICO)
+        self.arquivo.write(struct.pack('<I', len(cabecalho)))
+        self.arquivo.write(cabecalho)
+
+    def gravar_bloco(self, linhas):
+        self.arquivo.write(struct.pack('<I', len(linhas)))
+        for coluna, tipo in zip(zip(*linhas), self.tipos):
+            nulos = bytes(valor is None for valor in coluna)
+            segmento = zlib.compress(nulos + _CODIFICADORES[tipo](coluna), 1)
+            self.arquivo.write(struct.pack('<I', len(segmento)))
+            self.arquivo.write(segmento)
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+def _tipo_arrow(tipo, precisao, escala):
+    return {
+        'inteiro': pyarrow.int64(),
+        'real': pyarrow.float64(),
+        'decimal': pyarrow.decimal128(min(precisao or 38, 38), escala or 0),
+        'data': pyarrow.date32(),
+        'datahora': pyarrow.timestamp('us'),
+        'texto': pyarrow.string(),
+        'binario': pyarrow.binary(),
+    }[tipo]
+
+
+class _GravadorParquet:
+    """Grava Parquet com o pyarrow, um row group a cada LINHAS_POR_BLOCO linhas"""
+
+    def __init__(self, caminho, metadados):
+        self.tipos = metadados['tipos']
+        self.schema = pyarrow.schema(
+            [
+                pyarrow.field(coluna, _tipo_arrow(tipo, precisao, escala))
+                for coluna, tipo, precisao, escala in zip(
+                    metadados['colunas'], self.tipos, metadados['precisoes'], metadados['escalas'])
+            ],
+            metadata={'snapshot_colunar': json.dumps(metadados, ensure_ascii=False)},
+        )
+        self.escritor = pyarrow.parquet.ParquetWriter(caminho, self.schema, compression='zstd')
+
+    def gravar_bloco(self, linhas):
+        colunas = [
+            [_texto(valor) if tipo == 'texto' and valor is not None else valor for valor in coluna]
+            for coluna, tipo in zip(zip(*linhas), self.tipos)
+        ]
+        self.escritor.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(coluna, type=campo.type) for coluna, campo in zip(colunas, self.schema)],
+            schema=self.schema,
+        ))
+
+    def fechar(self):
+        self.escritor.close()
+
+
+class GravadorSnapshot:
+    """
+    Recebe os lotes de linhas de uma tabela (como no dump SQL) e grava o
+    snapshot colunar em blocos de LINHAS_POR_BLOCO linhas
+    """
+
+    def __init__(self, caminho_sem_extensao, tabela, estrutura, tipos_colunas):
+        # tipos_colunas: [(coluna, data_type, column_type, precisao, escala)] na ordem do SELECT *
+        metadados = {
+            'tabela': tabela,
+            'estrutura': estrutura,
+            'colunas': [coluna for coluna, *_ in tipos_colunas],
+            'tipos': [tipo_colunar(data_type, column_type) for _, data_type, column_type, _, _ in tipos_colunas],
+            'precisoes': [precisao for *_, precisao, _ in tipos_colunas],
+            'escalas': [escala for *_, escala in tipos_colunas],
+        }
+        self.caminho = f"{caminho_sem_extensao}{extensao_snapshot()}"
+        gravador = _GravadorParquet if pyarrow is not None else _GravadorBinario
+        self.gravador = gravador(self.caminho, metadados)
+        self.buffer = []
+        self.total = 0
+
+    def adicionar(self, lote):
+        """Adiciona um lote de linhas (tuplas na ordem das colunas)"""
+        self.buffer.extend(lote)
+        if len(self.buffer) >= LINHAS_POR_BLOCO:
+            self.gravador.gravar_bloco(self.buffer)
+            self.total += len(self.buffer)
+            self.buffer = []
+
+    def finalizar(self):
+        """Grava o que restou no buffer, fecha o arquivo e devolve o caminho"""
+        if self.buffer:
+            self.gravador.gravar_bloco(self.buffer)
+            self.total += len(self.buffer)
+            self.buffer = []
+        self.gravador.fechar()
+        return self.caminho
+
+    def descartar(self):
+        """Fecha e remove um snapshot incompleto"""
+        self.gravador.fechar()
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+
+def _ler_exato(arquivo, tamanho):
+    dados = arquivo.read(tamanho)
+    if len(dados) != tamanho:
+        raise ValueError(f"{arquivo.name}: arquivo .col truncado")
+    return dados
+
+
+def ler_metadados(caminho):
+    """Devolve os metadados do snapshot (tabela, estrutura, colunas, tipos)"""
+    if str(caminho).endswith(EXTENSAO_PARQUET):
+        if pyarrow is None:
+            raise RuntimeError(f"{caminho}: leitura de Parquet requer o pyarrow (pip install pyarrow)")
+        schema = pyarrow.parquet.read_schema(caminho)
+        return json.loads(schema.metadata[b'snapshot_colunar'])
+    with open(caminho, 'rb') as arquivo:
+        if arquivo.read(len(MAGICO)) != MAGICO:
+            raise ValueError(f"{caminho}: não é um snapshot .col")
+        tamanho, = struct.unpack('<I', _ler_exato(arquivo, 4))
+        return json.loads(_ler_exato(arquivo, tamanho))
+
+
+def ler_blocos(caminho):
+    """Gera, bloco a bloco, uma lista de valores por coluna"""
+    if str(caminho).endswith(EXTENSAO_PARQUET):
+        ler_metadados(caminho)
+        for lote in pyarrow.parquet.ParquetFile(caminho).iter_batches(batch_size=LINHAS_POR_BLOCO):
+            yield [coluna.to_pylist() for coluna in lote.columns]
+        return
+
+    with open(caminho, 'rb') as arquivo:
+        arquivo.read(len(MAGICO))
+        tamanho, = struct.unpack('<I', _ler_exato(arquivo, 4))
+        tipos = json.loads(_ler_exato(arquivo, tamanho))['tipos']
+        while True:
+            cabecalho = arquivo.read(4)
+            if not cabecalho:
+                break
+            quantidade, = struct.unpack('<I', cabecalho)
+            colunas = []
+            for tipo in tipos:
+                tamanho, = struct.unpack('<I', _ler_exato(arquivo, 4))
+                segmento = zlib.decompress(_ler_exato(arquivo, tamanho))
+                colunas.append(_DECODIFICADORES[tipo](segmento[quantidade:], segmento[:quantidade]))
+            yield colunas
+
+
+def ler_colunas(caminho):
+    """Lê o snapshot inteiro como {coluna: [valores]} (para análise fora do MySQL)"""
+    colunas = ler_metadados(caminho)['colunas']
+    dados = {coluna: [] for coluna in colunas}
+    for bloco in ler_blocos(caminho):
+        for coluna, valores in zip(colunas, bloco):
+            dados[coluna].extend(valores)
+    return dados
+
+
+def ler_linhas(caminho):
+    """Gera as linhas do snapshot como tuplas, na ordem das colunas"""
+    for bloco in ler_blocos(caminho):
+        yield from zip(*bloco)
+
+
+def carregar_snapshot(conn, caminho, recriar=True, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Carrega um snapshot no banco com a carga em lote (executemany). Com
+    recriar=True a tabela é removida e criada de novo a partir da estrutura
+    guardada no snapshot; senão as linhas são acrescentadas (partes seguintes
+    de uma exportação em faixas).
+    """
+    metadados = ler_metadados(caminho)
+    tabela = metadados['tabela']
+    if recriar:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS `{tabela}`")
+            cursor.execute(metadados['estrutura'])
+        finally:
+            cursor.close()
+    colunas = [f"`{coluna}`" for coluna in metadados['colunas']]
+    return carregar_em_lote(conn, f"`{tabela}`", colunas, ler_linhas(caminho), tamanho_lote)
+
+
+def main(arquivos):
+    """Carrega os snapshots informados no banco configurado no .env"""
+    conn = conectar_banco(perfil='carga')
+    if not conn:
+        return
+    recriadas = set()
+    try:
+        for caminho in arquivos:
+            tabela = ler_metadados(caminho)['tabela']
+            estatisticas = carregar_snapshot(conn, caminho, recriar=tabela not in recriadas)
+            recriadas.add(tabela)
+            print(f"✅ {os.path.basename(caminho)} -> {tabela}: {estatisticas['inseridos']} registros em "
+                  f"{estatisticas['duracao']:.2f}s ({estatisticas['linhas_por_segundo']:.0f} linhas/s)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega snapshots colunares (.parquet / .col) no MySQL")
+    parser.add_argument('arquivos', nargs='+',
+                        help="Snapshots a carregar (partes de uma mesma tabela na ordem)")
+    args = parser.parse_args()
+    main(args.arquivos)
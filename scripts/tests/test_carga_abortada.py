@@ -0,0 +1,155 @@
+"""Carga interrompida: a execução fica registrada como falha no histórico e no textfile"""
+
+from pathlib import Path
+
+import mysql.connector
+import pytest
+
+import carga_relatorio
+import historico_execucoes
+import process_all
+from benchmark_carga import gerar_relatorio
+from carga_lote import ler_relatorio
+from metricas import executar
+from rejeitos import OrcamentoErrosExcedido
+from relatorios_estoque import RELATORIO_FATEX01, colunas_carga, com_hash
+from troca_tabela import carregar_com_troca
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def execute(self, sql, parametros=None):
+        self.conn.sqls.append(sql)
+
+    def executemany(self, sql, linhas):
+        self.rowcount = len(linhas)
+        self.conn.linhas += len(linhas)
+
+    def fetchone(self):
+        return (self.conn.linhas,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    """Aceita qualquer SQL e conta as linhas inseridas (COUNT(*) devolve essa contagem)"""
+
+    def __init__(self):
+        self.linhas = 0
+        self.sqls = []
+
+    def cursor(self, **_):
+        return CursorFalso(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def gerar_com_rejeitadas(caminho, nome, linhas, invalidas):
+    """Relatório sintético com 'invalidas' registros com número inválido no primeiro campo decimal"""
+    gerar_relatorio(caminho, nome, linhas)
+    layout = RELATORIO_FATEX01.layout
+    campo = next(campo for campo in layout.campos if campo.tipo == 'decimal')
+    texto = Path(caminho).read_text(encoding='utf-8').splitlines(True)
+    for indice, linha in enumerate(texto):
+        if invalidas and layout.parse(linha) is not None:
+            texto[indice] = linha[:campo.inicio] + 'x' * (campo.fim - campo.inicio) + linha[campo.fim:]
+            invalidas -= 1
+    Path(caminho).write_text(''.join(texto), encoding='utf-8')
+
+
+@pytest.fixture
+def historico(tmp_path, monkeypatch):
+    """Registros do etl_runs e pasta do textfile da execução, sem banco"""
+    monkeypatch.chdir(tmp_path)
+    registros = []
+    monkeypatch.setattr(historico_execucoes, 'gravar_etl_runs', registros.append)
+    gravar_textfile = historico_execucoes.gravar_textfile
+    monkeypatch.setattr(historico_execucoes, 'gravar_textfile',
+                        lambda registro, resumo: gravar_textfile(registro, resumo, tmp_path / 'prometheus'))
+    (tmp_path / 'bases' / 'estoque').mkdir(parents=True)
+    return registros, tmp_path / 'prometheus'
+
+
+def test_orcamento_excedido_registra_execucao_com_erro(historico, monkeypatch):
+    registros, pasta_textfile = historico
+    conn = ConexaoFalsa()
+    monkeypatch.setattr(carga_relatorio, 'preparar_pool', lambda *args, **kwargs: True)
+    monkeypatch.setattr(carga_relatorio, 'conectar_banco', lambda *args, **kwargs: conn)
+    gerar_com_rejeitadas('bases/estoque/fatex01.txt', 'fatex01', 3000, 5)
+
+    with pytest.raises(OrcamentoErrosExcedido):
+        with executar('process_fatex01'):
+            carga_relatorio.processar_relatorio(RELATORIO_FATEX01, modo='pipeline', tamanho_lote=100,
+                                                max_rejeitos=(2, None))
+
+    registro, = registros
+    assert registro['status'] == 'erro'
+    # Os lotes gravados na staging descartada não contam como gravados
+    assert registro['registros_gravados'] == 0
+    assert registro['registros_por_segundo'] == 0
+    assert conn.sqls[-1] == 'DROP TABLE IF EXISTS estoque_fatex01__new'
+    textfile = (pasta_textfile / 'etl_process_fatex01.prom').read_text(encoding='utf-8')
+    assert 'etl_sucesso{script="process_fatex01"} 0.0' in textfile
+
+
+def test_process_all_com_arquivo_interrompido_registra_erro(historico, monkeypatch):
+    registros, pasta_textfile = historico
+    monkeypatch.setattr(process_all, 'preparar_pool', lambda *args, **kwargs: True)
+    monkeypatch.setattr(process_all, 'conectar_banco', lambda *args, **kwargs: ConexaoFalsa())
+    gerar_com_rejeitadas('bases/estoque/fatex01.txt', 'fatex01', 3000, 5)
+    gerar_relatorio('bases/estoque/tecido01.txt', 'tecido01', 3000)
+
+    with executar('process_all') as execucao:
+        resultados = process_all.processar_todos(Path('bases/estoque'), processos=2, max_rejeitos=(2, None))
+
+    assert resultados['tecido01']['inseridos'] > 0
+    assert 'inseridos' not in resultados['fatex01']
+    assert execucao.status == 'erro'
+    assert execucao.falhas[0].startswith('estoque_fatex01: ')
+    registro, = registros
+    assert registro['status'] == 'erro'
+    assert registro['registros_gravados'] == resultados['tecido01']['inseridos']
+    textfile = (pasta_textfile / 'etl_process_all.prom').read_text(encoding='utf-8')
+    assert 'etl_sucesso{script="process_all"} 0.0' in textfile
+
+
+class ConexaoComTrocaBloqueada(ConexaoFalsa):
+    """O RENAME TABLE falha como em um lock wait timeout"""
+
+    def cursor(self, **_):
+        cursor = CursorFalso(self)
+        executar_sql = cursor.execute
+
+        def execute(sql, parametros=None):
+            executar_sql(sql, parametros)
+            if sql.startswith('RENAME TABLE'):
+                raise mysql.connector.Error(msg='Lock wait timeout exceeded', errno=1205)
+
+        cursor.execute = execute
+        return cursor
+
+
+def test_falha_na_troca_descarta_staging(tmp_path):
+    caminho = tmp_path / 'fatex01.txt'
+    gerar_relatorio(caminho, 'fatex01', 1000)
+    conn = ConexaoComTrocaBloqueada()
+    linhas = com_hash(ler_relatorio(caminho, RELATORIO_FATEX01.layout, {'linhas': 0}))
+
+    with pytest.raises(mysql.connector.Error):
+        carregar_com_troca(conn, RELATORIO_FATEX01, linhas, colunas_carga(RELATORIO_FATEX01), 'lote', 100)
+
+    assert conn.sqls[-1] == 'DROP TABLE IF EXISTS estoque_fatex01__new'
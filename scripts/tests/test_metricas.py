@@ -0,0 +1,28 @@
+"""Perfil do --profile com threads (pipeline de carga)"""
+
+import io
+import threading
+
+from metricas import _PerfilThreads
+
+
+def test_perfil_nao_impede_threads_e_cobre_todas():
+    rodou = []
+
+    def alvo_da_thread():
+        rodou.append(sum(range(10000)))
+
+    perfil = _PerfilThreads()
+    perfil.iniciar()
+    try:
+        thread = threading.Thread(target=alvo_da_thread)
+        thread.start()
+        thread.join()
+    finally:
+        estatisticas = perfil.parar()
+
+    assert rodou
+    saida = io.StringIO()
+    estatisticas.stream = saida
+    estatisticas.print_stats('alvo_da_thread')
+    assert 'alvo_da_thread' in saida.getvalue()
@@ -0,0 +1,97 @@
+"""Paridade do motor vetorizado com o parse por linha em relatórios sintéticos"""
+
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import metricas
+from benchmark_carga import gerar_relatorio
+from carga_lote import ler_relatorio
+from layout_fixo import MOTIVOS_REJEICAO
+from parse_paralelo import parse_bloco
+from parse_vetorizado import ler_relatorio_vetorizado, parse_linhas
+from rejeitos import Rejeitos
+from relatorios_estoque import RELATORIOS
+
+NOMES = sorted(RELATORIOS)
+
+
+def gerar(caminho, nome, linhas=5000, invalidas=0):
+    """Relatório sintético; 'invalidas' registros recebem texto em um campo numérico ou de data"""
+    gerar_relatorio(caminho, nome, linhas)
+    if not invalidas:
+        return
+    layout = RELATORIOS[nome].layout
+    campos = [campo for campo in layout.campos if campo.tipo in MOTIVOS_REJEICAO]
+    texto = Path(caminho).read_text(encoding='utf-8').splitlines(True)
+    feitas = 0
+    for indice, linha in enumerate(texto):
+        if feitas < invalidas and indice % 7 == 0 and layout.parse(linha) is not None:
+            campo = campos[feitas % len(campos)]
+            texto[indice] = linha[:campo.inicio] + 'x' * (campo.fim - campo.inicio) + linha[campo.fim:]
+            feitas += 1
+    Path(caminho).write_text(''.join(texto), encoding='utf-8')
+
+
+@pytest.mark.parametrize('nome', NOMES)
+def test_parse_linhas_igual_ao_parse_por_linha(tmp_path, nome):
+    caminho = tmp_path / f'{nome}.txt'
+    gerar(caminho, nome)
+    layout = RELATORIOS[nome].layout
+    linhas = caminho.read_text(encoding='utf-8').splitlines(True)
+
+    esperadas = [valores for valores in map(layout.parse, linhas) if valores is not None]
+    assert esperadas
+    assert parse_linhas(layout, linhas) == esperadas
+
+
+def _ler(funcao, caminho, layout, pasta, descartar=False):
+    """Tuplas, linhas do arquivo de rejeitos e contadores de uma leitura"""
+    execucao = metricas.Execucao('teste')
+    metricas._atual = execucao
+    try:
+        with Rejeitos(layout.nome, pasta=pasta, descartar=descartar) as rejeitos:
+            tuplas = list(funcao(caminho, layout, {'linhas': 0}, rejeitos))
+    finally:
+        metricas._atual = None
+    return tuplas, rejeitos.caminho.read_text(encoding='utf-8'), execucao.contadores
+
+
+@pytest.mark.parametrize('descartar', [False, True])
+@pytest.mark.parametrize('nome', NOMES)
+def test_ler_relatorio_vetorizado_igual_ao_ler_relatorio(tmp_path, nome, descartar):
+    caminho = tmp_path / f'{nome}.txt'
+    gerar(caminho, nome, invalidas=25)
+    layout = RELATORIOS[nome].layout
+    registros = len([valores for valores in map(layout.parse, caminho.read_text(encoding='utf-8').splitlines(True))
+                     if valores])
+
+    tuplas, rejeitadas, contadores = _ler(ler_relatorio, caminho, layout, tmp_path / 'linha', descartar)
+    # Lotes menores que o arquivo: a numeração das rejeitadas atravessa os lotes
+    tuplas_vetorizado, rejeitadas_vetorizado, contadores_vetorizado = _ler(
+        partial(ler_relatorio_vetorizado, linhas_por_lote=1000), caminho, layout, tmp_path / 'vetorizado',
+        descartar)
+
+    assert tuplas_vetorizado == tuplas
+    assert rejeitadas_vetorizado == rejeitadas
+    assert len(rejeitadas.splitlines()) == 1 + 25
+    assert contadores_vetorizado == contadores
+    # Sem descartar, os registros inválidos seguem com NULL e só ficam no arquivo de rejeitos
+    assert len(tuplas) == registros - (25 if descartar else 0)
+    assert contadores.get('linhas_rejeitadas', 0) == (25 if descartar else 0)
+
+
+@pytest.mark.parametrize('descartar', [False, True])
+@pytest.mark.parametrize('nome', NOMES)
+def test_parse_bloco_vetorizado_igual_ao_por_linha(tmp_path, nome, descartar):
+    caminho = tmp_path / f'{nome}.txt'
+    gerar(caminho, nome, invalidas=10)
+    fim = caminho.stat().st_size
+
+    esperado = parse_bloco(nome, str(caminho), 0, fim, True, 'linha', descartar)
+    assert len(esperado[2]) == 10
+    assert len(esperado[1]) == len(parse_bloco(nome, str(caminho), 0, fim)[1]) - (10 if descartar else 0)
+    assert parse_bloco(nome, str(caminho), 0, fim, True, 'vetorizado', descartar) == esperado
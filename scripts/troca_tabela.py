@@ -0,0 +1,165 @@
+"""
+TROCA ATÔMICA DE TABELAS DE ESTOQUE
+===================================
+
+A carga completa é feita em uma tabela de staging (estoque_fatex01__new),
+que recebe os índices secundários só depois da carga em massa, é validada e
+só então publicada com um único RENAME TABLE sobre a tabela em
+uso. As páginas que consultam estoque_* nunca veem a tabela vazia ou pela
+metade, e a carga não precisa se preocupar com consultas concorrentes.
+"""
+
+import time
+
+import mysql.connector
+
+import metricas
+from carga_lote import TAMANHO_LOTE_PADRAO, carregar_linhas
+from relatorios_estoque import sql_criar_indices, sql_criar_tabela
+
+SUFIXO_STAGING = '__new'
+SUFIXO_ANTIGA = '__old'
+
+
+def tabela_existe(conn, tabela):
+    """Verifica se a tabela existe no banco atual"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            (tabela,)
+        )
+        return cursor.fetchone()[0] > 0
+    finally:
+        cursor.close()
+
+
+def criar_tabela_staging(conn, relatorio):
+    """(Re)cria a tabela de staging vazia e devolve o nome dela"""
+    staging = relatorio.tabela + SUFIXO_STAGING
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(sql_criar_tabela(relatorio, staging))
+        conn.commit()
+    finally:
+        cursor.close()
+    return staging
+
+
+def criar_indices(conn, relatorio, tabela):
+    """Cria de uma vez os índices secundários declarados para o relatório"""
+    sql = sql_criar_indices(relatorio, tabela)
+    if not sql:
+        return 0.0
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+    finally:
+        cursor.close()
+    return time.perf_counter() - inicio
+
+
+def descartar_staging(conn, staging):
+    """Remove a staging de uma carga que não será publicada"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    finally:
+        cursor.close()
+
+
+def validar_staging(conn, staging, esperados):
+    """Confere se a staging tem exatamente os registros esperados (e não está vazia)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+        total = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if total == 0:
+        return False, "tabela de staging vazia"
+    if total != esperados:
+        return False, f"staging com {total} registros, esperados {esperados}"
+    return True, f"{total} registros"
+
+
+def publicar_staging(conn, relatorio, staging):
+    """Troca a tabela em uso pela staging com um único RENAME TABLE atômico"""
+    antiga = relatorio.tabela + SUFIXO_ANTIGA
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {antiga}")
+        if tabela_existe(conn, relatorio.tabela):
+            cursor.execute(
+                f"RENAME TABLE {relatorio.tabela} TO {antiga}, {staging} TO {relatorio.tabela}"
+            )
+            cursor.execute(f"DROP TABLE IF EXISTS {antiga}")
+        else:
+            cursor.execute(f"RENAME TABLE {staging} TO {relatorio.tabela}")
+    finally:
+        cursor.close()
+
+
+def _contar(linhas, contagem):
+    """Repassa as linhas contando quantas foram entregues para a carga"""
+    for linha in linhas:
+        contagem[0] += 1
+        yield linha
+
+
+def _rejeitadas_na_gravacao(rejeitos):
+    """Linhas recusadas pelo banco no INSERT e mandadas para o arquivo de rejeitos"""
+    if rejeitos is None:
+        return 0
+    return sum(quantidade for motivo, quantidade in rejeitos.motivos.items() if motivo.startswith('gravacao_'))
+
+
+def carregar_com_troca(conn, relatorio, linhas, colunas, modo='lote', tamanho_lote=TAMANHO_LOTE_PADRAO,
+                       rejeitos=None, gravadores=1):
+    """
+    Carga completa via staging: cria a staging, carrega, cria os índices,
+    valida e publica.
+    A staging deve ter os registros parseados menos os recusados no INSERT;
+    se não tiver, ou se qualquer etapa falhar até a troca (orçamento de
+    erros, erro do banco, interrupção), a staging é descartada e a tabela em
+    uso fica intacta.
+    """
+    # Só os registros publicados contam como gravados no histórico: uma staging descartada não conta
+    metricas.atual().contar('registros_publicados', 0)
+    staging = criar_tabela_staging(conn, relatorio)
+    entregues = [0]
+    recusadas_antes = _rejeitadas_na_gravacao(rejeitos)
+    try:
+        estatisticas = carregar_linhas(conn, staging, colunas, _contar(linhas, entregues), modo, tamanho_lote,
+                                       rejeitos, gravadores)
+        estatisticas['tempo_indices'] = criar_indices(conn, relatorio, staging)
+        metricas.atual().somar_etapa('indices', estatisticas['tempo_indices'])
+
+        inicio = time.perf_counter()
+        # No infile as linhas recusadas pelo servidor não passam pelo arquivo de rejeitos: a staging fica menor
+        if rejeitos is not None:
+            recusadas = _rejeitadas_na_gravacao(rejeitos) - recusadas_antes
+        else:
+            recusadas = 0 if estatisticas['modo'] == 'infile' else estatisticas['erros']
+        valida, detalhe = validar_staging(conn, staging, entregues[0] - recusadas)
+        if not valida:
+            raise RuntimeError(f"Validação de {staging} falhou ({detalhe}); {relatorio.tabela} não foi alterada")
+
+        # O RENAME é atômico: se falhar (lock wait timeout, metadata lock) a staging continua lá e é descartada
+        publicar_staging(conn, relatorio, staging)
+    except BaseException:
+        try:
+            conn.rollback()
+            descartar_staging(conn, staging)
+        except mysql.connector.Error as err:
+            print(f"Aviso: não foi possível descartar {staging}: {err}")
+        raise
+
+    estatisticas['tempo_troca'] = time.perf_counter() - inicio
+    metricas.atual().somar_etapa('troca', estatisticas['tempo_troca'])
+    metricas.atual().contar('registros_publicados', estatisticas['inseridos'])
+    print(f"Tabela {relatorio.tabela} publicada ({detalhe})")
+    return estatisticas
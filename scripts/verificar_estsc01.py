@@ -1,14 +1,13 @@
 import mysql.connector
 
+from db import conectar_banco
+
 def verificar_dados():
     """Verifica os dados inseridos na tabela estoque_estsc01"""
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='123456789',
-            database='datalake'
-        )
+        conn = conectar_banco()
+        if not conn:
+            return
 
         cursor = conn.cursor()
 